@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from enigma import ALPHABET, EnigmaPlugboard, EnigmaReflector, EnigmaRotor, build_machine, parse_plugboard
+
+# Key sheet columns; rotors are space separated ("I II III"), rings and
+# positions one letter per rotor, plugboard in the GUI format ("AB CD")
+KEY_FIELDS = ('key', 'rotors', 'rings', 'positions', 'reflector', 'plugboard')
+
+
+def _read_records(path):
+    # A JSON list of objects, or a CSV file with a header row
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def load_key_sheet(path):
+    # key -> settings. JSON may also be an object keyed by key name.
+    records = _read_records(path)
+    if isinstance(records, dict):
+        records = [dict(settings, key=key) for key, settings in records.items()]
+
+    sheet = {}
+    for record in records:
+        rotors = record['rotors']
+        if isinstance(rotors, str):
+            rotors = rotors.split()
+        for rotor in rotors:
+            if rotor not in EnigmaRotor.HISTORICAL_ROTORS:
+                raise ValueError(f"key {record['key']}: unknown rotor {rotor!r}")
+        reflector = record.get('reflector') or 'B'
+        if reflector not in EnigmaReflector.HISTORICAL_REFLECTORS:
+            raise ValueError(f"key {record['key']}: unknown reflector {reflector!r}")
+        rings = (record.get('rings') or 'A' * len(rotors)).upper()
+        if len(rings) != len(rotors) or not all(c in ALPHABET for c in rings):
+            raise ValueError(f"key {record['key']}: bad rings {rings!r}")
+        try:
+            parse_plugboard(record.get('plugboard') or '')
+        except ValueError as error:
+            raise ValueError(f"key {record['key']}: {error}") from None
+        sheet[record['key']] = {
+            'rotors': tuple(rotors),
+            'rings': rings,
+            'positions': record.get('positions') or 'A' * len(rotors),
+            'reflector': reflector,
+            'plugboard': record.get('plugboard') or '',
+        }
+    return sheet
+
+
+def load_messages(path):
+    # Each message has an id, the key it is sent under, its text and
+    # optionally its own start positions (message key)
+    return [{'id': record['id'], 'key': record['key'], 'text': record['text'],
+             'positions': record.get('positions') or None}
+            for record in _read_records(path)]
+
+
+def _encrypt_group(settings, items):
+    # One machine per configuration; every message just moves its rotors
+    rotors, rings, reflector, plugboard_table = settings
+    machine = build_machine(rotors, rings, 'A' * len(rotors), reflector)
+    machine.plugboard = EnigmaPlugboard.from_table(plugboard_table)
+    engine = machine.compile()
+    results = []
+    for message_id, positions, text in items:
+        engine.restore(bytes(ALPHABET.index(c) for c in positions))
+        results.append((message_id, engine.encrypt_message(text)))
+    return results
+
+
+def group_messages(key_sheet, messages):
+    # Messages keyed by the configuration they need (positions aside), so
+    # keys that share rotors, rings, reflector and plugboard share a machine.
+    # The plugboard goes in as its table: "AB CD" and "DC BA" are one setting.
+    groups = {}
+    for message in messages:
+        settings = key_sheet[message['key']]
+        positions = (message['positions'] or settings['positions']).upper()
+        if len(positions) != len(settings['rotors']) or not all(c in ALPHABET for c in positions):
+            raise ValueError(f"message {message['id']}: bad positions {positions!r}")
+        config = (settings['rotors'], settings['rings'], settings['reflector'],
+                  parse_plugboard(settings['plugboard']).table())
+        groups.setdefault(config, []).append((message['id'], positions, message['text']))
+    return groups
+
+
+def encrypt_batch(key_sheet, messages, workers=None):
+    # Encrypt every message under its key, one process pool task per
+    # configuration. Yields (message id, ciphertext) as groups finish.
+    groups = group_messages(key_sheet, messages)
+    if workers == 1:
+        for config, items in groups.items():
+            yield from _encrypt_group(config, items)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_encrypt_group, config, items) for config, items in groups.items()]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Encrypt many messages, each under its own key from a key sheet")
+    parser.add_argument('key_sheet', help=f"CSV or JSON with fields: {', '.join(KEY_FIELDS)}")
+    parser.add_argument('messages', help="CSV or JSON with fields: id, key, text[, positions]")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='-', help="JSON lines output file ('-' for stdout)")
+    args = parser.parse_args()
+
+    sheet = load_key_sheet(args.key_sheet)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for message_id, ciphertext in encrypt_batch(sheet, load_messages(args.messages), args.workers):
+            out.write(json.dumps({'id': message_id, 'text': ciphertext}) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import enigma
+
+SIZES = [1 << 10, 10 << 10, 100 << 10, 1 << 20, 10 << 20, 100 << 20]
+
+
+def measure(func, ops=1, repeat=5):
+    # Median wall time of `repeat` calls; `ops` is the work per call
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    seconds = statistics.median(times)
+    return {'seconds': seconds, 'ops': ops, 'ops_per_second': ops / seconds if seconds else None}
+
+
+def default_machine():
+    return enigma.build_machine(['I', 'II', 'III'], 'AAA', 'AAA', 'B', 'AB CD EF')
+
+
+def sample_text(size, seed=0):
+    # Letters with spaces and punctuation mixed in, like real traffic
+    rng = random.Random(seed)
+    alphabet = enigma.ALPHABET * 4 + ' ,.'
+    return ''.join(rng.choices(alphabet, k=size))
+
+
+def bench_engine(sizes, repeat):
+    results = {}
+    letters = sample_text(10000).replace(' ', 'X').replace(',', 'Y').replace('.', 'Z')
+    rotor = enigma.EnigmaRotor('II', 'C', 'F')
+
+    def mapping(method):
+        def run():
+            for char in letters:
+                method(char)
+        return run
+
+    results['rotor.forward_mapping'] = measure(mapping(rotor.forward_mapping), len(letters), repeat)
+    results['rotor.backward_mapping'] = measure(mapping(rotor.backward_mapping), len(letters), repeat)
+    results['machine.process_letter'] = measure(mapping(default_machine().process_letter), len(letters), repeat)
+
+    # Short messages (below the NumPy threshold) with and without a warm
+    # permutation cache, restarting from the same positions each run
+    message = sample_text(1000)
+    for name, cache in (('uncached', None), ('cached', enigma.PermutationCache())):
+        machine = default_machine()
+        machine.permutation_cache = cache
+        engine = machine.compile()
+        start = list(engine.positions)
+        engine.encrypt_message(message)
+
+        def run():
+            engine.restore(start)
+            engine.encrypt_message(message)
+        results[f'compiled.encrypt_message[1000,{name}]'] = measure(run, len(message), repeat)
+
+    for size in sizes:
+        message = sample_text(size)
+        # Large inputs are expensive to repeat; one run is already a long sample
+        runs = repeat if size <= (1 << 20) else 1
+        results[f'machine.encrypt_message[{size}]'] = measure(
+            lambda: default_machine().encrypt_message(message), size, runs)
+    return results
+
+
+# Run in a fresh interpreter: from `import enigma` to the first encrypted letter
+COLD_START = """
+import time
+start = time.perf_counter()
+import enigma
+enigma.build_machine(['I', 'II', 'III'], 'AAA', 'AAA', 'B').encrypt_message('A')
+print(time.perf_counter() - start)
+"""
+
+
+def bench_cold_start(repeat):
+    # What a freshly spawned worker pays before its first letter
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = [float(subprocess.run([sys.executable, '-c', COLD_START], cwd=here, check=True,
+                                  capture_output=True, text=True).stdout)
+             for _ in range(repeat)]
+    seconds = statistics.median(times)
+    return {'cold_start': {'seconds': seconds, 'ops': 1, 'ops_per_second': 1 / seconds if seconds else None}}
+
+
+def start_virtual_display():
+    # Returns the Xvfb process we started, or None if a display is already
+    # available or Xvfb is not installed
+    if os.environ.get('DISPLAY') or not shutil.which('Xvfb'):
+        return None
+    display = ':99'
+    process = subprocess.Popen(['Xvfb', display, '-screen', '0', '1280x1024x24'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ['DISPLAY'] = display
+    time.sleep(1)
+    return process
+
+
+def bench_gui(repeat):
+    import tkinter as tk
+
+    xvfb = start_virtual_display()
+    try:
+        try:
+            root = tk.Tk()
+        except tk.TclError as error:
+            print(f"skipping GUI benchmarks: {error}", file=sys.stderr)
+            return {}
+        app = enigma.EnigmaSimulatorApp(root)
+        app.plugboard_var.set('AB CD EF GH')
+        app.apply_settings()
+        root.update()
+        app.enigma.process_letter('A')
+
+        def redraw(draw, *args):
+            def run():
+                for _ in range(100):
+                    draw(*args)
+                    root.update_idletasks()
+            return run
+
+        results = {
+            'gui.draw_rotors': measure(redraw(app.draw_rotors), 100, repeat),
+            'gui.draw_signal_flow': measure(redraw(app.draw_signal_flow, 5), 100, repeat),
+            'gui.draw_plugboard': measure(redraw(app.draw_plugboard), 100, repeat),
+        }
+        root.destroy()
+        return results
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+
+def compare(results, baseline, threshold):
+    # Slower than baseline by more than `threshold` (fraction) is a regression
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = result['seconds'] / baseline[name]['seconds']
+        flag = 'REGRESSION' if ratio > 1 + threshold else ''
+        print(f"{name:45} {baseline[name]['seconds']:10.6f} -> {result['seconds']:10.6f}  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cipher engine and GUI redraws")
+    parser.add_argument('--output', default='benchmark.json', help="JSON file to write results to")
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES, help="message sizes in bytes")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-gui', action='store_true', help="skip the Tk redraw benchmarks")
+    parser.add_argument('--compare', metavar='BASELINE', help="flag regressions against a stored result file")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown before flagging (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = bench_engine(args.sizes, args.repeat)
+    results.update(bench_cold_start(args.repeat))
+    if not args.no_gui:
+        results.update(bench_gui(args.repeat))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': enigma.load_numpy().__version__ if enigma.load_numpy() is not None else None,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, result in results.items():
+        print(f"{name:45} {result['seconds']:10.6f} s  {result['ops_per_second'] or 0:14,.0f} ops/s")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print()
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,205 @@
+import itertools
+import time
+
+import numpy as np
+
+from enigma import ALPHABET, EnigmaMachine, EnigmaReflector, EnigmaRotor
+from enigma.keystream import all_states, notch_successors
+
+# Every (left, middle, right) rotor position of a three-rotor machine, with
+# state index left * 676 + middle * 26 + right
+ALL_STATES = all_states(3)
+
+
+def state_successors(rotor_types, fast_ring=0):
+    # State index after one key press, for every state, following the
+    # machine's real stepping (double step included). States are wiring
+    # offsets (position minus ring); the fast rotor's ring moves where its
+    # turnover falls among them, the other rings are taken as A.
+    notches = [EnigmaRotor(rotor_type).notch_flags for rotor_type in rotor_types]
+    notches[2] = notches[2][fast_ring:] + notches[2][:fast_ring]
+    return notch_successors(notches)
+
+
+def scrambler_tables(rotor_types, reflector_type):
+    # Flat (state * 26 + letter) -> letter table of the scrambler without
+    # plugboard, ring settings A
+    machine = EnigmaMachine([EnigmaRotor(rotor_type) for rotor_type in rotor_types],
+                            EnigmaReflector(reflector_type))
+    return machine.compile()._state_permutations(ALL_STATES).ravel().astype(np.intp)
+
+
+class BombeStop:
+    def __init__(self, rotor_types, reflector_type, positions, steckers, rings='AAA'):
+        self.rotor_types = rotor_types
+        self.reflector_type = reflector_type
+        self.positions = positions
+        self.steckers = steckers
+        self.rings = rings
+
+    def plugboard_text(self):
+        # Implied pairs in the GUI plugboard format, self-steckered letters left out
+        pairs = sorted({''.join(sorted(pair)) for pair in self.steckers.items() if pair[0] != pair[1]})
+        return ' '.join(pairs)
+
+    def __repr__(self):
+        return (f"BombeStop(rotors={'-'.join(self.rotor_types)}, reflector={self.reflector_type}, "
+                f"rings={self.rings}, positions={self.positions}, plugboard={self.plugboard_text()!r})")
+
+
+def letters_only(text):
+    return ''.join(char for char in text.upper() if char in ALPHABET)
+
+
+def crib_offsets(ciphertext, crib):
+    # No letter ever encrypts to itself, so a crib can only sit where none
+    # of its letters lines up with the same ciphertext letter
+    ciphertext = letters_only(ciphertext)
+    crib = letters_only(crib)
+    return [offset for offset in range(len(ciphertext) - len(crib) + 1)
+            if all(p != c for p, c in zip(crib, ciphertext[offset:]))]
+
+
+class Bombe:
+    """Crib attack on a three-rotor machine. Only rotor offsets (position
+    minus ring) matter to the wiring, so a ring setting is just a shift of
+    the start position, except that the fast rotor's ring also decides at
+    which letter the middle rotor turns over. The sweep therefore covers
+    every rotor order, start offset and fast-rotor ring. The left and
+    middle rings are taken as A: the left rotor's ring never affects
+    stepping, and the middle one's only moves the double step, which a crib
+    shorter than 26 x 26 letters crosses at most once. A stop gives the
+    rotor order, rings (AA plus the fast ring) and start positions that
+    reproduce the crib, and the plugboard as implied steckers; the true
+    middle ring can differ if the crib spans a double step."""
+
+    def __init__(self, ciphertext, crib, offset=0, rotors=('I', 'II', 'III', 'IV', 'V'), reflectors=('B',)):
+        self.ciphertext = letters_only(ciphertext)
+        self.crib = letters_only(crib)
+        self.offset = offset
+        self.rotors = rotors
+        self.reflectors = reflectors
+
+        if offset not in crib_offsets(self.ciphertext, self.crib):
+            raise ValueError(f"crib cannot be placed at offset {offset}: a letter would encrypt to itself")
+
+        self.test_letter, self.menu_edges = self._build_menu()
+
+    def menu(self):
+        # Letter pairs linked by the scrambler, as (plain, cipher, crib position)
+        return [(self.crib[i], self.ciphertext[self.offset + i], i) for i in range(len(self.crib))]
+
+    def _build_menu(self):
+        # Test the most connected letter and walk its part of the menu
+        # breadth first. Each edge is (known, other, crib position, is_new):
+        # new edges imply the other letter's stecker, loops check it and
+        # come up as soon as both ends are known.
+        links = {}
+        for plain, cipher, i in self.menu():
+            links.setdefault(plain, []).append((cipher, i))
+            links.setdefault(cipher, []).append((plain, i))
+        test_letter = max(links, key=lambda letter: len(links[letter]))
+
+        edges = []
+        reached = [test_letter]
+        used = set()
+        for letter in reached:
+            for other, i in links[letter]:
+                if i in used:
+                    continue
+                used.add(i)
+                is_new = other not in reached
+                if is_new:
+                    reached.append(other)
+                edges.append((letter, other, i, is_new))
+        return test_letter, edges
+
+    def _state_sequences(self, rotor_types, fast_ring):
+        # Rotor state at each crib letter for every start state
+        successor = state_successors(rotor_types, fast_ring)
+        sequences = []
+        states = np.arange(len(ALL_STATES))
+        for _ in range(self.offset + len(self.crib)):
+            states = successor[states]
+            sequences.append(states)
+        return sequences[self.offset:]
+
+    def test_order(self, rotor_types, reflector_type):
+        # One sweep of the start states per fast-rotor ring; the scrambler
+        # tables depend on offsets only and are shared
+        scrambler = scrambler_tables(rotor_types, reflector_type)
+        stops = []
+        for fast_ring in range(26):
+            stops.extend(self._test_turnover(rotor_types, reflector_type, scrambler, fast_ring))
+        return stops
+
+    def _test_turnover(self, rotor_types, reflector_type, scrambler, fast_ring):
+        # Every start state x every stecker hypothesis for the test letter
+        # is one lane; lanes are dropped as soon as a loop contradicts them
+        sequences = self._state_sequences(rotor_types, fast_ring)
+
+        starts = np.repeat(np.arange(len(ALL_STATES)), 26)
+        values = {self.test_letter: np.tile(np.arange(26), len(ALL_STATES))}
+        for known, other, i, is_new in self.menu_edges:
+            implied = scrambler[sequences[i][starts] * 26 + values[known]]
+            if is_new:
+                values[other] = implied
+                continue
+            keep = implied == values[other]
+            if not keep.all():
+                starts = starts[keep]
+                values = {letter: value[keep] for letter, value in values.items()}
+                if not len(starts):
+                    return []
+
+        # Steckers must pair letters off: no two letters on the same partner,
+        # and a partner that is itself on the menu must point back
+        keep = np.ones(len(starts), dtype=bool)
+        menu_letters = list(values)
+        for a, b in itertools.combinations(menu_letters, 2):
+            keep &= values[a] != values[b]
+        for a in menu_letters:
+            for b in menu_letters:
+                keep &= (values[a] != ord(b) - ord('A')) | (values[b] == ord(a) - ord('A'))
+
+        stops = []
+        rings = 'AA' + ALPHABET[fast_ring]
+        for lane in np.flatnonzero(keep):
+            left, middle, right = ALL_STATES[starts[lane]]
+            positions = ALPHABET[left] + ALPHABET[middle] + ALPHABET[(right + fast_ring) % 26]
+            steckers = {letter: ALPHABET[values[letter][lane]] for letter in menu_letters}
+            stops.append(BombeStop(tuple(rotor_types), reflector_type, positions, steckers, rings))
+        return stops
+
+    def run(self, progress=None):
+        # Sweep every rotor order and reflector (and within each, every
+        # fast-rotor ring). `progress`, if given, is
+        # called with (orders done, total orders, stops so far).
+        orders = [(order, reflector)
+                  for order in itertools.permutations(self.rotors, 3)
+                  for reflector in self.reflectors]
+        stops = []
+        for done, (order, reflector) in enumerate(orders, 1):
+            stops.extend(self.test_order(order, reflector))
+            if progress:
+                progress(done, len(orders), len(stops))
+        return stops
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Turing-Bombe style crib attack")
+    parser.add_argument('ciphertext')
+    parser.add_argument('crib')
+    parser.add_argument('--offset', type=int, default=0, help="letter offset of the crib in the ciphertext")
+    parser.add_argument('--rotors', nargs='+', default=['I', 'II', 'III', 'IV', 'V'])
+    parser.add_argument('--reflectors', nargs='+', default=['B'])
+    args = parser.parse_args()
+
+    bombe = Bombe(args.ciphertext, args.crib, args.offset, args.rotors, args.reflectors)
+    start = time.perf_counter()
+    stops = bombe.run(lambda done, total, found: print(f"\r{done}/{total} orders, {found} stops", end='', flush=True))
+    print(f"\n{len(stops)} stops in {time.perf_counter() - start:.1f} s")
+    for stop in stops:
+        print(stop)
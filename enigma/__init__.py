@@ -0,0 +1,28 @@
+"""Enigma machine simulator.
+
+The cipher engine is importable on its own: `import enigma` does not load
+Tk or NumPy. The GUI classes are imported from enigma.gui on first access.
+"""
+from .core import (ALPHABET, CompiledEnigma, EngineMetrics, EnigmaMachine, EnigmaPlugboard,
+                   EnigmaReflector, EnigmaRotor, MachineState, PermutationCache, build_machine,
+                   count_letters, encrypt_file, encrypt_parallel, load_numpy, machine_from_config,
+                   parse_plugboard)
+from .stream import StreamEncryptor
+from .cli import run_cli
+
+__all__ = [
+    'ALPHABET', 'CompiledEnigma', 'EngineMetrics', 'EnigmaMachine', 'EnigmaPlugboard',
+    'EnigmaReflector', 'EnigmaRotor', 'MachineState', 'PermutationCache', 'build_machine',
+    'count_letters', 'encrypt_file', 'encrypt_parallel', 'load_numpy', 'machine_from_config',
+    'parse_plugboard', 'StreamEncryptor', 'run_cli',
+]
+
+# Not in __all__, so a star import does not pull in Tk either
+_GUI_NAMES = ('EnigmaApp', 'EnigmaSimulatorApp', 'ScrollableFrame')
+
+
+def __getattr__(name):
+    if name in _GUI_NAMES:
+        from . import gui
+        return getattr(gui, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
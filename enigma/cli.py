@@ -0,0 +1,98 @@
+import time
+
+from .core import (ALPHABET, EngineMetrics, EnigmaReflector, EnigmaRotor, build_machine,
+                   encrypt_file)
+from .stream import StreamEncryptor
+
+def run_cli(argv=None):
+    import argparse
+    import os
+    import sys
+
+    def rotor_list(value):
+        # One argument, like --rings and --positions, so that files can
+        # follow it: "I II III" or "I,II,III"
+        rotors = value.replace(',', ' ').split()
+        for rotor in rotors:
+            if rotor not in EnigmaRotor.HISTORICAL_ROTORS:
+                raise argparse.ArgumentTypeError(
+                    f"unknown rotor {rotor!r} (choose from {', '.join(EnigmaRotor.HISTORICAL_ROTORS)})")
+        if not rotors:
+            raise argparse.ArgumentTypeError("no rotors given")
+        return rotors
+
+    parser = argparse.ArgumentParser(
+        description="Encrypt or decrypt files with the Enigma machine, without the GUI. "
+                    "ASCII letters are encrypted (output in upper case); all other bytes pass through.")
+    parser.add_argument('files', nargs='*', default=['-'],
+                        help="input files, '-' for stdin (default)")
+    parser.add_argument('--rotors', type=rotor_list, default=['I', 'II', 'III'],
+                        help='rotor types, left to right, as one argument: "I II III" or I,II,III')
+    parser.add_argument('--rings', default=None, help="ring settings, one letter per rotor (default: all A)")
+    parser.add_argument('--positions', default=None, help="start positions, one letter per rotor (default: all A)")
+    parser.add_argument('--reflector', default='B', choices=list(EnigmaReflector.HISTORICAL_REFLECTORS))
+    parser.add_argument('--plugboard', default='', help='plugboard pairs, format: "AB CD EF..."')
+    parser.add_argument('--chunk-size', type=int, default=1 << 20, help="bytes read per chunk")
+    parser.add_argument('--output', default=None,
+                        help="write to this file instead of stdout; a single input file is then "
+                             "encrypted through memory maps")
+    parser.add_argument('--quiet', action='store_true', help="do not report throughput on stderr")
+    parser.add_argument('--tables', metavar='DIR', default=None,
+                        help="encrypt through precomputed keystream tables kept in DIR (needs numpy)")
+    parser.add_argument('--metrics', metavar='PATH', default=None,
+                        help="write timings here on exit (Prometheus text for *.prom, JSON otherwise)")
+    args = parser.parse_intermixed_args(argv)
+
+    def letters(value):
+        value = ''.join((value or 'A' * len(args.rotors)).split()).upper()
+        if len(value) != len(args.rotors) or not all(c in ALPHABET for c in value):
+            parser.error(f"expected {len(args.rotors)} letters A-Z, got {value!r}")
+        return value
+
+    for name in args.files:
+        if name != '-' and not os.path.isfile(name):
+            parser.error(f"{name}: no such file")
+
+    try:
+        machine = build_machine(args.rotors, letters(args.rings), letters(args.positions),
+                                args.reflector, args.plugboard)
+    except ValueError as error:
+        parser.error(str(error))
+    encrypt, encrypt_path = StreamEncryptor(machine).update, encrypt_file
+    if args.tables:
+        from .keystream import KeystreamStore
+        store = KeystreamStore(args.tables)
+        encrypt = lambda chunk: store.encrypt_bytes(machine, chunk)
+    if args.metrics:
+        metrics = EngineMetrics()
+        metrics.dump_on_exit(args.metrics)
+        encrypt = metrics.wrap('encrypt_bytes', encrypt)
+        encrypt_path = metrics.wrap('encrypt_file', encrypt_path)
+
+    start = time.perf_counter()
+    if args.output and len(args.files) == 1 and args.files[0] != '-' and not args.tables:
+        total = encrypt_path(machine, args.files[0], args.output)
+    else:
+        out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+        total = 0
+        for name in args.files:
+            stream = sys.stdin.buffer if name == '-' else open(name, 'rb')
+            try:
+                while True:
+                    chunk = stream.read(args.chunk_size)
+                    if not chunk:
+                        break
+                    out.write(encrypt(chunk))
+                    total += len(chunk)
+            finally:
+                if stream is not sys.stdin.buffer:
+                    stream.close()
+        out.flush()
+        if out is not sys.stdout.buffer:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        rate = total / elapsed / 1e6 if elapsed > 0 else float('inf')
+        print(f"{total} bytes in {elapsed:.3f} s ({rate:.2f} MB/s)", file=sys.stderr)
+    return 0
@@ -0,0 +1,1176 @@
+import math
+import os
+import time
+import atexit
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# NumPy is optional, only the vectorized engine needs it. It is also the
+# slowest import by far, so it is loaded on first use: short-lived workers
+# that encrypt a few letters never pay for it.
+_numpy = None
+_numpy_loaded = False
+
+def load_numpy():
+    # The numpy module, or None if it is not installed
+    global _numpy, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy, _numpy_loaded = numpy, True
+    return _numpy
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+class EnigmaRotor:
+    # Historical Enigma rotor wirings
+    HISTORICAL_ROTORS = {
+        'I': 'EKMFLGDQVZNTOWYHXUSPAIBRCJ',
+        'II': 'AJDKSIRUXBLHWTMCQGZNPYFVOE',
+        'III': 'BDFHJLCPRTXVZNYEIWGAKMUSQO',
+        'IV': 'ESOVPZJAYQUIRHXLNFTGKDCMWB',
+        'V': 'VZBRGITYUPSDNHLXAWMJQOFECK',
+        'VI': 'JPGVOUMFYQBENHZRDKASXLICTW',
+        'VII': 'NZJHGRCXMYSWBOUFAIVLPEKQDT',
+        'VIII': 'FKQHTLXOCBJSPDZRAMEWNIUYGV',
+        'Beta': 'LEYJVCNIXWPBQMDRTAKZGFUHOS',
+        'Gamma': 'FSOKANUERHMBTIYCWLQPZXVGJD'
+    }
+    
+    # Historical rotor notch positions
+    NOTCH_POSITIONS = {
+        'I': 'Q',        # Notch at position 16 (Q)
+        'II': 'E',       # Notch at position 4 (E)
+        'III': 'V',      # Notch at position 21 (V)
+        'IV': 'J',       # Notch at position 9 (J)
+        'V': 'Z',        # Notch at position 25 (Z)
+        'VI': 'ZM',      # Notches at positions 25 (Z) and 12 (M)
+        'VII': 'ZM',     # Notches at positions 25 (Z) and 12 (M)
+        'VIII': 'ZM',    # Notches at positions 25 (Z) and 12 (M)
+        'Beta': '',      # No notches on Beta rotor
+        'Gamma': ''      # No notches on Gamma rotor
+    }
+    
+    # Compiled integer tables, shared by every rotor with the same wiring
+    _COMPILED_TABLES = {}
+
+    __slots__ = ('rotor_type', 'wiring', 'notches', 'ring_setting', 'position',
+                 'forward_table', 'backward_table', 'notch_flags')
+
+    def __init__(self, rotor_type, ring_setting=0, initial_position='A'):
+        self.rotor_type = rotor_type
+        self.wiring = self.HISTORICAL_ROTORS[rotor_type]
+        self.notches = self.NOTCH_POSITIONS[rotor_type]
+        self.ring_setting = ord(ring_setting) - ord('A') if isinstance(ring_setting, str) else ring_setting
+        self.position = ord(initial_position) - ord('A') if isinstance(initial_position, str) else initial_position
+        self.forward_table, self.backward_table = self.compile_wiring(self.wiring)
+        self.notch_flags = [chr(i + ord('A')) in self.notches for i in range(26)]
+
+    @classmethod
+    def compile_wiring(cls, wiring):
+        # Precompute the forward and inverse wiring for every offset
+        # (position - ring setting), so a mapping is a single list lookup:
+        #   forward_table[offset][char_idx] -> output index
+        if wiring not in cls._COMPILED_TABLES:
+            mapping = [ord(c) - ord('A') for c in wiring]
+            inverse = [0] * 26
+            for i, m in enumerate(mapping):
+                inverse[m] = i
+
+            forward_table = []
+            backward_table = []
+            for offset in range(26):
+                forward_table.append([(mapping[(c + offset) % 26] - offset) % 26 for c in range(26)])
+                backward_table.append([(inverse[(c + offset) % 26] - offset) % 26 for c in range(26)])
+            cls._COMPILED_TABLES[wiring] = (forward_table, backward_table)
+        return cls._COMPILED_TABLES[wiring]
+
+    def offset(self):
+        return (self.position - self.ring_setting) % 26
+
+    def forward_mapping(self, input_char):
+        char_idx = (ord(input_char) - ord('A')) % 26
+        return ALPHABET[self.forward_table[self.offset()][char_idx]]
+    
+    def backward_mapping(self, input_char):
+        char_idx = (ord(input_char) - ord('A')) % 26
+        return ALPHABET[self.backward_table[self.offset()][char_idx]]
+    
+    def rotate(self):
+        self.position = (self.position + 1) % 26
+        return self.is_at_notch()
+    
+    def is_at_notch(self):
+        return self.notch_flags[self.position % 26]
+    
+    def get_display_letter(self):
+        return chr((self.position) % 26 + ord('A'))
+
+class EnigmaReflector:
+    # Historical Enigma reflector wirings
+    HISTORICAL_REFLECTORS = {
+        'A': 'EJMZALYXVBWFCRQUONTSPIKHGD',
+        'B': 'YRUHQSLDPXNGOKMIEBFZCWVJAT',
+        'C': 'FVPJIAOYEDRZXWGCTKUQSBNMHL',
+        'BThin': 'ENKQAUYWJICOPBLMDXZVFTHRGS',
+        'CThin': 'RDOBJNTKVEHMLFCWZAXGYIPSUQ'
+    }
+
+    __slots__ = ('reflector_type', 'wiring', 'mapping')
+    
+    def __init__(self, reflector_type):
+        self.reflector_type = reflector_type
+        self.wiring = self.HISTORICAL_REFLECTORS[reflector_type]
+        self.mapping = [ord(c) - ord('A') for c in self.wiring]
+    
+    def reflect(self, input_char):
+        # Convert character to index (0-25)
+        char_idx = ord(input_char) - ord('A')
+        
+        # Find the mapped character in the wiring
+        mapped_char = self.wiring[char_idx]
+        
+        return mapped_char
+
+class EnigmaPlugboard:
+    """Plugboard as a 26-entry table (letter index -> plugged letter index).
+    Cables swap two letters, so the table is always an involution; plugging
+    a letter that already has a cable is an error. The compiled engine
+    (and so the NumPy path, keystream tables and batch) folds table() into
+    its composed permutations rather than applying the plugboard as a
+    separate stage."""
+
+    # _letters mirrors _table as letter -> letter for the scalar path
+    __slots__ = ('_table', '_letters')
+
+    def __init__(self):
+        self._table = bytearray(range(26))
+        self._letters = dict(zip(ALPHABET, ALPHABET))
+
+    @classmethod
+    def from_table(cls, table):
+        table = bytes(table)
+        if len(table) != 26 or any(plugged >= 26 or table[plugged] != i for i, plugged in enumerate(table)):
+            raise ValueError(f"not a plugboard table: {table!r}")
+        plugboard = cls()
+        plugboard._table[:] = table
+        plugboard._letters = {ALPHABET[i]: ALPHABET[plugged] for i, plugged in enumerate(table)}
+        return plugboard
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        plugboard = cls()
+        for char1, char2 in pairs:
+            plugboard.add_connection(char1, char2)
+        return plugboard
+
+    @property
+    def connections(self):
+        # Plugged letters both ways round: {'A': 'B', 'B': 'A', ...}
+        return {ALPHABET[i]: ALPHABET[plugged] for i, plugged in enumerate(self._table) if plugged != i}
+
+    def table(self):
+        # 26-byte table: letter index -> plugged letter index
+        return bytes(self._table)
+    
+    def add_connection(self, char1, char2):
+        char1, char2 = char1.upper(), char2.upper()
+        for char in (char1, char2):
+            if len(char) != 1 or char not in ALPHABET:
+                raise ValueError(f"plugboard letters must be A-Z, got {char!r}")
+        if char1 == char2:
+            raise ValueError(f"cannot plug {char1} to itself")
+        i, j = ord(char1) - ord('A'), ord(char2) - ord('A')
+        if self._table[i] == j:
+            return
+        for char, index in ((char1, i), (char2, j)):
+            if self._table[index] != index:
+                raise ValueError(f"{char} is already plugged to {ALPHABET[self._table[index]]}")
+        self._table[i] = j
+        self._table[j] = i
+        self._letters[char1] = char2
+        self._letters[char2] = char1
+    
+    def process(self, input_char):
+        return self._letters.get(input_char, input_char)
+
+class PermutationCache:
+    """Bounded LRU cache of composed keyboard-to-lamp permutations. Entries
+    are grouped by machine configuration and keyed on the rotor positions
+    before a key press, packed into an int (base 26, leftmost rotor most
+    significant); each holds the packed positions after the press and the
+    permutation there. maxsize bounds the entries of all configurations
+    together; the oldest entries of the least recently used configuration
+    go first. One cache can be shared by every machine running under the
+    same daily key. ASCII messages long enough for the NumPy engine
+    (CompiledEnigma.VECTORIZE_THRESHOLD) go there instead and skip it."""
+
+    def __init__(self, maxsize=4 * 26 ** 3):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._configs = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entries(self, config_key):
+        # The configuration's LRU, marked as the most recently used one
+        entries = self._configs.get(config_key)
+        if entries is None:
+            entries = self._configs[config_key] = OrderedDict()
+        else:
+            self._configs.move_to_end(config_key)
+        return entries
+
+    def _store(self, entries, state, entry):
+        entries[state] = entry
+        self.size += 1
+        while self.size > self.maxsize:
+            oldest = next(iter(self._configs.values()))
+            oldest.popitem(last=False)
+            if not oldest:
+                self._configs.popitem(last=False)
+            self.size -= 1
+            self.evictions += 1
+
+    def get(self, config_key, state):
+        entries = self._entries(config_key)
+        entry = entries.get(state)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            entries.move_to_end(state)
+        return entry
+
+    def put(self, config_key, state, entry):
+        entries = self._entries(config_key)
+        if state in entries:
+            entries[state] = entry
+            entries.move_to_end(state)
+        else:
+            self._store(entries, state, entry)
+
+    def walk(self, config_key, state, presses, step):
+        # Permutations for `presses` key presses in a row from the packed
+        # `state`, looked up in bulk; step(state) makes a missing entry.
+        # Returns (permutations, packed state after the last press).
+        entries = self._entries(config_key)
+        get = entries.get
+        move_to_end = entries.move_to_end
+        permutations = []
+        append = permutations.append
+        misses = 0
+        for _ in range(presses):
+            entry = get(state)
+            if entry is None:
+                entry = step(state)
+                misses += 1
+                self._store(entries, state, entry)
+            else:
+                move_to_end(state)
+            state, permutation = entry
+            append(permutation)
+        self.hits += presses - misses
+        self.misses += misses
+        return permutations, state
+
+    def clear(self):
+        self._configs.clear()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': self.size,
+            'configurations': len(self._configs),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+class EngineMetrics:
+    """Opt-in call counts and cumulative timings by stage (stepping,
+    plugboard, each rotor pass, reflector, Tk redraws...). Nothing records
+    unless a machine or the GUI is given one."""
+
+    def __init__(self):
+        self.counts = {}
+        self.seconds = {}
+
+    def lap(self, stage, start):
+        # Charge the time since `start` to `stage`; returns the new start
+        now = time.perf_counter()
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + now - start
+        return now
+
+    def count(self, stage, n=1):
+        self.counts[stage] = self.counts.get(stage, 0) + n
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.lap(stage, start)
+
+    def wrap(self, stage, func):
+        # func, timed under `stage` on every call
+        def timed_call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.lap(stage, start)
+        return timed_call
+
+    def reset(self):
+        self.counts.clear()
+        self.seconds.clear()
+
+    def stats(self):
+        # Plain counters (count()) have no 'seconds'
+        stats = {}
+        for stage in sorted(self.counts):
+            stats[stage] = {'count': self.counts[stage]}
+            if stage in self.seconds:
+                stats[stage]['seconds'] = self.seconds[stage]
+        return stats
+
+    def to_json(self):
+        import json
+        return json.dumps(self.stats(), indent=2)
+
+    def to_prometheus(self, prefix='enigma'):
+        # Text exposition format, one series per stage
+        stats = self.stats()
+        lines = [f"# TYPE {prefix}_stage_calls_total counter"]
+        for stage, values in stats.items():
+            lines.append(f'{prefix}_stage_calls_total{{stage="{stage}"}} {values["count"]}')
+        lines.append(f"# TYPE {prefix}_stage_seconds_total counter")
+        for stage, values in stats.items():
+            if 'seconds' in values:
+                lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {values["seconds"]:.9f}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        # Prometheus text for *.prom files, JSON otherwise
+        with open(path, 'w') as f:
+            f.write(self.to_prometheus() if path.endswith('.prom') else self.to_json())
+
+    def dump_on_exit(self, path):
+        atexit.register(self.dump, path)
+
+class MachineState:
+    """Compact, immutable and hashable copy of a machine's settings and rotor
+    positions: rotor and reflector types as indices, rings and positions as
+    one byte per rotor, the plugboard as a 26-byte table."""
+
+    ROTOR_TYPES = tuple(EnigmaRotor.HISTORICAL_ROTORS)
+    REFLECTOR_TYPES = tuple(EnigmaReflector.HISTORICAL_REFLECTORS)
+
+    __slots__ = ('rotors', 'rings', 'positions', 'reflector', 'plugboard', '_key')
+
+    def __init__(self, rotors, rings, positions, reflector, plugboard):
+        self.rotors = rotors
+        self.rings = rings
+        self.positions = positions
+        self.reflector = reflector
+        self.plugboard = plugboard
+        self._key = (rotors, rings, positions, reflector, plugboard)
+
+    def key(self):
+        return self._key
+
+    def same_settings(self, other):
+        # Equal apart from rotor positions
+        return (self.rotors == other.rotors and self.rings == other.rings
+                and self.reflector == other.reflector and self.plugboard == other.plugboard)
+
+    def with_positions(self, positions):
+        return MachineState(self.rotors, self.rings, bytes(positions), self.reflector, self.plugboard)
+
+    def __eq__(self, other):
+        return isinstance(other, MachineState) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        rotors = '-'.join(self.ROTOR_TYPES[i] for i in self.rotors)
+        rings = ''.join(ALPHABET[i] for i in self.rings)
+        positions = ''.join(ALPHABET[i] for i in self.positions)
+        return f"MachineState({rotors}, rings={rings}, positions={positions}, reflector={self.REFLECTOR_TYPES[self.reflector]})"
+
+class EnigmaMachine:
+    # How much process_letter records: nothing, the last key and lamp, or
+    # the last key and lamp plus the full signal path (learning mode)
+    TRACE_OFF = 'off'
+    TRACE_LAMP = 'lamp'
+    TRACE_FULL = 'full'
+    # signal_path below TRACE_FULL, shared by every machine
+    NO_SIGNAL_PATH = ()
+
+    __slots__ = ('rotors', 'reflector', 'plugboard', 'permutation_cache', 'trace_level', 'metrics',
+                 'keyboard', 'last_key', 'last_lamp', 'signal_path')
+
+    def __init__(self, rotors, reflector, plugboard=None, permutation_cache=None, trace_level=TRACE_FULL,
+                 metrics=None):
+        self.rotors = rotors
+        self.reflector = reflector
+        self.plugboard = plugboard if plugboard else EnigmaPlugboard()
+        self.permutation_cache = permutation_cache
+        self.trace_level = trace_level
+        self.metrics = metrics
+        self.keyboard = "QWERTZUIOASDFGHJKPYXCVBNML"
+        self.last_key = None
+        self.last_lamp = None
+        self.signal_path = self.NO_SIGNAL_PATH
+    
+    def process_letter(self, letter):
+        if not letter.isalpha():
+            return letter
+            
+        upper_letter = letter.upper()
+        trace = self.trace_level == self.TRACE_FULL
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        
+        # Track signal path
+        current_letter = upper_letter
+        if trace:
+            self.signal_path = [('input', current_letter)]
+        else:
+            self.signal_path = self.NO_SIGNAL_PATH
+        
+        # Step 1: Rotate rotors
+        self._rotate_rotors()
+        if metrics is not None:
+            start = metrics.lap('stepping', start)
+        
+        # Step 2: Pass through plugboard
+        current_letter = self.plugboard.process(current_letter)
+        if trace:
+            self.signal_path.append(('plugboard', current_letter))
+        if metrics is not None:
+            start = metrics.lap('plugboard', start)
+        
+        # Step 3: Pass through rotors (forward)
+        for i, rotor in enumerate(reversed(self.rotors)):
+            current_letter = rotor.forward_mapping(current_letter)
+            if trace:
+                self.signal_path.append((f'rotor_{len(self.rotors) - i} forward', current_letter))
+            if metrics is not None:
+                start = metrics.lap(f'rotor_{len(self.rotors) - i} forward', start)
+        
+        # Step 4: Pass through reflector
+        current_letter = self.reflector.reflect(current_letter)
+        if trace:
+            self.signal_path.append(('reflector', current_letter))
+        if metrics is not None:
+            start = metrics.lap('reflector', start)
+        
+        # Step 5: Pass back through rotors (backward)
+        for i, rotor in enumerate(self.rotors):
+            current_letter = rotor.backward_mapping(current_letter)
+            if trace:
+                self.signal_path.append((f'rotor_{i+1} backward', current_letter))
+            if metrics is not None:
+                start = metrics.lap(f'rotor_{i+1} backward', start)
+        
+        # Step 6: Pass back through plugboard
+        current_letter = self.plugboard.process(current_letter)
+        if trace:
+            self.signal_path.append(('plugboard out', current_letter))
+        if metrics is not None:
+            metrics.lap('plugboard out', start)
+        
+        if self.trace_level != self.TRACE_OFF:
+            self.last_key = upper_letter
+            self.last_lamp = current_letter
+        
+        return current_letter
+    
+    def _rotate_rotors(self):
+        # Implement the correct Enigma stepping mechanism with double-stepping.
+        # Only the rightmost three rotors step; the M4's greek rotor, left
+        # of them, never moves.
+        rotors = self.rotors[-3:]
+        
+        # Check if middle rotor is at notch position (double-stepping)
+        middle_at_notch = False
+        if len(rotors) > 1:
+            middle_at_notch = rotors[1].is_at_notch()
+        
+        # Check if rightmost (fast) rotor is at notch position
+        rightmost_at_notch = rotors[-1].is_at_notch()
+        
+        # Determine which rotors should turn
+        rotate_leftmost = middle_at_notch and len(rotors) > 2
+        rotate_middle = rightmost_at_notch or middle_at_notch
+        rotate_rightmost = True  # The rightmost rotor always rotates
+        
+        # Rotate the rotors as needed
+        if rotate_leftmost:
+            rotors[0].rotate()
+        if rotate_middle and len(rotors) > 1:
+            rotors[1].rotate()
+        if rotate_rightmost and len(rotors) > 0:
+            rotors[-1].rotate()
+    
+    def encrypt_message(self, message):
+        # Run the message through the compiled integer engine, then carry its
+        # final rotor positions back onto this machine's rotors. The compiled
+        # engine has no separate stages, so metrics only see the whole call.
+        if self.metrics is not None:
+            start = time.perf_counter()
+        engine = self.compile()
+        encrypted = engine.encrypt_message(message)
+        engine.store_positions(self)
+        if self.metrics is not None:
+            self.metrics.lap('encrypt_message', start)
+            self.metrics.count('letters', count_letters(message))
+        if engine.last_lamp is not None and self.trace_level != self.TRACE_OFF:
+            self.last_key = engine.last_key
+            self.last_lamp = engine.last_lamp
+        return encrypted
+
+    def compile(self):
+        return CompiledEnigma(self, self.permutation_cache)
+
+    def snapshot(self):
+        return MachineState(
+            bytes(MachineState.ROTOR_TYPES.index(rotor.rotor_type) for rotor in self.rotors),
+            bytes(rotor.ring_setting % 26 for rotor in self.rotors),
+            bytes(rotor.position % 26 for rotor in self.rotors),
+            MachineState.REFLECTOR_TYPES.index(self.reflector.reflector_type),
+            self.plugboard.table(),
+        )
+
+    def restore(self, state):
+        # Only components whose settings differ are rebuilt; restoring a
+        # snapshot of the same settings just moves the rotors
+        if len(self.rotors) != len(state.rotors):
+            self.rotors = [None] * len(state.rotors)
+        for i, (rotor_idx, ring, position) in enumerate(zip(state.rotors, state.rings, state.positions)):
+            rotor = self.rotors[i]
+            rotor_type = MachineState.ROTOR_TYPES[rotor_idx]
+            if rotor is None or rotor.rotor_type != rotor_type or rotor.ring_setting != ring:
+                self.rotors[i] = EnigmaRotor(rotor_type, ring, position)
+            else:
+                rotor.position = position
+
+        reflector_type = MachineState.REFLECTOR_TYPES[state.reflector]
+        if self.reflector.reflector_type != reflector_type:
+            self.reflector = EnigmaReflector(reflector_type)
+        if self.plugboard.table() != state.plugboard:
+            self.plugboard = EnigmaPlugboard.from_table(state.plugboard)
+
+    @classmethod
+    def from_state(cls, state, **kwargs):
+        machine = cls([], EnigmaReflector(MachineState.REFLECTOR_TYPES[state.reflector]), **kwargs)
+        machine.restore(state)
+        return machine
+
+    def config_key(self):
+        # Everything except rotor positions that decides the permutation
+        return (
+            tuple(rotor.rotor_type for rotor in self.rotors),
+            tuple(rotor.ring_setting % 26 for rotor in self.rotors),
+            self.reflector.reflector_type,
+            tuple(sorted(self.plugboard.connections.items())),
+        )
+
+    def _step_positions(self, positions):
+        # _rotate_rotors on a plain list of positions
+        first = max(0, len(positions) - 3)
+        stepping = len(positions) - first
+        middle_at_notch = stepping > 1 and self.rotors[first + 1].notch_flags[positions[first + 1]]
+        rightmost_at_notch = self.rotors[-1].notch_flags[positions[-1]]
+        if middle_at_notch and stepping > 2:
+            positions[first] = (positions[first] + 1) % 26
+        if (rightmost_at_notch or middle_at_notch) and stepping > 1:
+            positions[first + 1] = (positions[first + 1] + 1) % 26
+        positions[-1] = (positions[-1] + 1) % 26
+
+    def positions_after(self, steps):
+        # Rotor positions after `steps` more key presses, without touching
+        # the machine. Only the rightmost three rotors ever move, so
+        # everything follows from counting fast-rotor carries.
+        if steps < 0:
+            raise ValueError("steps must be non-negative")
+        positions = [rotor.position % 26 for rotor in self.rotors]
+
+        if len(positions) < 3:
+            # The rightmost rotor alone decides the stepping: walk its single
+            # revolution (at most 26 presses) and index into it
+            seen = []
+            while positions not in seen and len(seen) < steps:
+                seen.append(list(positions))
+                self._step_positions(positions)
+            if len(seen) == steps:
+                return positions
+            cycle_start = seen.index(positions)
+            return seen[cycle_start + (steps - cycle_start) % (len(seen) - cycle_start)]
+
+        middle_flags = self.rotors[-2].notch_flags
+        fast_flags = self.rotors[-1].notch_flags
+
+        # Press explicitly until the middle rotor is off its notch; after
+        # that every double step happens on the press right after the carry
+        # that put the middle rotor on a notch
+        while steps > 0:
+            self._step_positions(positions)
+            steps -= 1
+            if not middle_flags[positions[-2]]:
+                break
+        if steps == 0:
+            return positions
+
+        # Carries: presses that start with the fast rotor on a notch
+        fast = positions[-1]
+        carries = 0
+        for notch in range(26):
+            if fast_flags[notch]:
+                first = (notch - fast) % 26
+                if first < steps:
+                    carries += (steps - 1 - first) // 26 + 1
+
+        # Each middle revolution takes one carry per non-notch position and
+        # double steps once per notch
+        middle_notches = sum(middle_flags)
+        revolutions, remainder = divmod(carries, 26 - middle_notches)
+        middle = positions[-2]
+        double_steps = revolutions * middle_notches
+        for _ in range(remainder):
+            middle = (middle + 1) % 26
+            if middle_flags[middle]:
+                middle = (middle + 1) % 26
+                double_steps += 1
+
+        # A carry on the very last press leaves its double step pending
+        if fast_flags[(fast + steps - 1) % 26] and carries and middle_flags[(middle - 1) % 26]:
+            middle = (middle - 1) % 26
+            double_steps -= 1
+
+        positions[-3] = (positions[-3] + double_steps) % 26
+        positions[-2] = middle
+        positions[-1] = (fast + steps) % 26
+        return positions
+
+    def seek(self, steps):
+        # Jump the rotors ahead as if `steps` letters had been typed
+        for rotor, position in zip(self.rotors, self.positions_after(steps)):
+            rotor.position = position
+
+    def cycle_length(self):
+        # Key presses after which the rotor positions repeat (once any
+        # start-up transient has passed)
+        if len(self.rotors) < 3:
+            positions = [rotor.position % 26 for rotor in self.rotors]
+            for _ in range(2):
+                self._step_positions(positions)
+            start = list(positions)
+            length = 1
+            self._step_positions(positions)
+            while positions != start:
+                self._step_positions(positions)
+                length += 1
+            return length
+
+        fast_notches = sum(self.rotors[-1].notch_flags)
+        middle_notches = sum(self.rotors[-2].notch_flags)
+        if fast_notches == 0:
+            return 26
+
+        # Fast rotor notches are evenly spaced, so carries arrive every
+        # 26 / fast_notches presses
+        middle_period = (26 - middle_notches) * 26 // fast_notches
+        period = middle_period * 26 // math.gcd(middle_period, 26)
+        double_steps = middle_notches * period // middle_period
+        if double_steps:
+            period *= 26 // math.gcd(double_steps, 26)
+        return period
+    
+    def get_rotor_positions(self):
+        return [rotor.get_display_letter() for rotor in self.rotors]
+    
+    def get_signal_path(self):
+        return self.signal_path
+    
+    def get_keyboard_layout(self):
+        return self.keyboard
+
+
+class CompiledEnigma:
+    """Integer lookup-table engine with the same stepping and output as
+    EnigmaMachine.process_letter, minus the signal path bookkeeping."""
+
+    # Messages at least this long go through the NumPy engine when available
+    VECTORIZE_THRESHOLD = 1024
+    # Letters gathered per NumPy window, bounds temporary memory
+    VECTORIZE_WINDOW = 1 << 20
+
+    def __init__(self, machine, cache=None):
+        rotors = machine.rotors
+        self.forward_tables = [rotor.forward_table for rotor in rotors]
+        self.backward_tables = [rotor.backward_table for rotor in rotors]
+        self.notch_flags = [rotor.notch_flags for rotor in rotors]
+        self.rings = [rotor.ring_setting % 26 for rotor in rotors]
+        self.positions = [rotor.position % 26 for rotor in rotors]
+        # Rotors left of the rightmost three (the M4's greek rotor) never
+        # step, so they are folded into the reflector
+        self.static = max(0, len(rotors) - 3)
+        self.reflector_mapping = machine.reflector.mapping
+        self.reflector = self._fold_reflector()
+
+        # Plugboard as a 26-entry table
+        self.plugboard = list(machine.plugboard.table())
+
+        # Keyboard entry: letter -> index after the plugboard. Lamps: index
+        # before the return plugboard -> output letter.
+        self.entry = {}
+        for i, letter in enumerate(ALPHABET):
+            self.entry[letter] = self.plugboard[i]
+            self.entry[letter.lower()] = self.plugboard[i]
+        self.lamps = [ALPHABET[self.plugboard[i]] for i in range(26)]
+
+        self.last_key = None
+        self.last_lamp = None
+        self._inner = None
+        self._trajectory = None
+
+        self.cache = cache
+        if cache is not None:
+            self.config_key = machine.config_key()
+            self.letter_index = {}
+            for i, letter in enumerate(ALPHABET):
+                self.letter_index[letter] = i
+                self.letter_index[letter.lower()] = i
+
+    def _fold_reflector(self):
+        # Static rotors in, reflector, static rotors out: one permutation
+        # that stands in for the reflector while the static rotors stay put
+        offsets = [(self.positions[i] - self.rings[i]) % 26 for i in range(self.static)]
+        folded = []
+        for c in range(26):
+            for i in range(self.static - 1, -1, -1):
+                c = self.forward_tables[i][offsets[i]][c]
+            c = self.reflector_mapping[c]
+            for i in range(self.static):
+                c = self.backward_tables[i][offsets[i]][c]
+            folded.append(c)
+        return folded
+
+    def _inner_permutation(self):
+        # Everything left of the fast rotor (slower rotors, reflector and the
+        # way back) only changes when one of those rotors steps, so compose
+        # it into one table and rebuild lazily.
+        n = len(self.positions)
+        offsets = [(self.positions[i] - self.rings[i]) % 26 for i in range(n - 1)]
+        inner = []
+        for c in range(26):
+            for i in range(n - 2, self.static - 1, -1):
+                c = self.forward_tables[i][offsets[i]][c]
+            c = self.reflector[c]
+            for i in range(self.static, n - 1):
+                c = self.backward_tables[i][offsets[i]][c]
+            inner.append(c)
+        return inner
+
+    def _step(self):
+        # Same rules as EnigmaMachine._rotate_rotors, including double stepping
+        pos = self.positions
+        first = self.static
+        stepping = len(pos) - first
+        middle_at_notch = stepping > 1 and self.notch_flags[first + 1][pos[first + 1]]
+        rightmost_at_notch = self.notch_flags[-1][pos[-1]]
+        if middle_at_notch and stepping > 2:
+            pos[first] = (pos[first] + 1) % 26
+        if (rightmost_at_notch or middle_at_notch) and stepping > 1:
+            pos[first + 1] = (pos[first + 1] + 1) % 26
+            self._inner = None
+        pos[-1] = (pos[-1] + 1) % 26
+
+    def _entry_index(self, letter):
+        idx = self.entry.get(letter)
+        if idx is None:
+            # Non-ASCII letters skip the plugboard and wrap onto A-Z, exactly
+            # like the character-based path
+            idx = (ord(letter.upper()) - ord('A')) % 26
+        return idx
+
+    def process_index(self, c):
+        self._step()
+        if self._inner is None:
+            self._inner = self._inner_permutation()
+        offset = (self.positions[-1] - self.rings[-1]) % 26
+        c = self.forward_tables[-1][offset][c]
+        c = self._inner[c]
+        return self.backward_tables[-1][offset][c]
+
+    def process_letter(self, letter):
+        if not letter.isalpha():
+            return letter
+        output = self.lamps[self.process_index(self._entry_index(letter))]
+        self.last_key = letter.upper()
+        self.last_lamp = output
+        return output
+
+    def lamp_permutation(self):
+        # Keyboard letter index -> lamp letter at the current positions,
+        # plugboard included on both sides
+        if self._inner is None:
+            self._inner = self._inner_permutation()
+        offset = (self.positions[-1] - self.rings[-1]) % 26
+        forward = self.forward_tables[-1][offset]
+        backward = self.backward_tables[-1][offset]
+        return ''.join(self.lamps[backward[self._inner[forward[self.plugboard[x]]]]] for x in range(26))
+
+    def _encrypt_cached(self, message):
+        # All the message's permutations come from one bulk walk of the
+        # cache; only misses step and compose on this engine
+        letter_index = self.letter_index
+        state = 0
+        for position in self.positions:
+            state = state * 26 + position
+        permutations, state = self.cache.walk(self.config_key, state, count_letters(message),
+                                              self._cache_entry)
+        self._unpack_state(state)
+        if not permutations:
+            return message
+
+        encrypted = []
+        append = encrypted.append
+        permutations = iter(permutations)
+        for char in message:
+            x = letter_index.get(char)
+            if x is None:
+                if not char.isalpha():
+                    append(char)
+                    continue
+                # Non-ASCII letters skip the plugboard, so undo the one
+                # composed into the permutation
+                x = self.plugboard[self._entry_index(char)]
+            append(next(permutations)[x])
+
+        # One output per character, so the last letter's lamp sits at the
+        # same index
+        i = len(message) - 1
+        while not message[i].isalpha():
+            i -= 1
+        self.last_key = message[i].upper()
+        self.last_lamp = encrypted[i]
+        return ''.join(encrypted)
+
+    def _cache_entry(self, state):
+        # Cache entry for the packed `state`: packed positions after one key
+        # press and the permutation there
+        self._unpack_state(state)
+        self._step()
+        after = 0
+        for position in self.positions:
+            after = after * 26 + position
+        return after, self.lamp_permutation()
+
+    def _unpack_state(self, state):
+        pos = self.positions
+        for i in range(len(pos) - 1, -1, -1):
+            state, position = divmod(state, 26)
+            if pos[i] != position:
+                pos[i] = position
+                if i < len(pos) - 1:
+                    self._inner = None
+
+    def encrypt_message(self, message):
+        if len(message) >= self.VECTORIZE_THRESHOLD and message.isascii() and load_numpy() is not None:
+            return self.encrypt_bytes(message.encode('ascii')).decode('ascii')
+        if self.cache is not None:
+            return self._encrypt_cached(message)
+        if len(self.positions) < 3:
+            return ''.join(self.process_letter(char) for char in message)
+
+        entry = self.entry
+        lamps = self.lamps
+        pos = self.positions
+        left = len(pos) - 3
+        middle = len(pos) - 2
+        middle_notch = self.notch_flags[middle]
+        fast_notch = self.notch_flags[-1]
+        fast_forward = self.forward_tables[-1]
+        fast_backward = self.backward_tables[-1]
+        fast_ring = self.rings[-1]
+        fast_pos = pos[-1]
+        inner = self._inner or self._inner_permutation()
+
+        encrypted = []
+        append = encrypted.append
+        last_key = last_lamp = None
+        for char in message:
+            c = entry.get(char)
+            if c is None:
+                if not char.isalpha():
+                    append(char)
+                    continue
+                c = self._entry_index(char)
+            last_key = char
+
+            # Step: double step on the middle notch, else carry from the fast rotor
+            if middle_notch[pos[middle]]:
+                pos[left] = (pos[left] + 1) % 26
+                pos[middle] = (pos[middle] + 1) % 26
+                inner = self._inner_permutation()
+            elif fast_notch[fast_pos]:
+                pos[middle] = (pos[middle] + 1) % 26
+                inner = self._inner_permutation()
+            fast_pos = (fast_pos + 1) % 26
+            pos[-1] = fast_pos
+
+            offset = (fast_pos - fast_ring) % 26
+            last_lamp = lamps[fast_backward[offset][inner[fast_forward[offset][c]]]]
+            append(last_lamp)
+
+        self._inner = inner
+        if last_key is not None:
+            self.last_key = last_key.upper()
+            self.last_lamp = last_lamp
+        return ''.join(encrypted)
+
+    def _state_cycle(self, limit):
+        # Walk the stepping from the current positions, collecting the rotor
+        # positions seen by each key press. Stepping is deterministic, so it
+        # ends in a cycle; return the states and where the cycle starts
+        # (None if `limit` presses came first).
+        saved = list(self.positions)
+        seen = {}
+        states = []
+        cycle_start = None
+        while len(states) < limit:
+            self._step()
+            state = tuple(self.positions)
+            if state in seen:
+                cycle_start = seen[state]
+                break
+            seen[state] = len(states)
+            states.append(state)
+        self.positions[:] = saved
+        self._inner = None
+        return states, cycle_start
+
+    def _state_permutations(self, states):
+        # Full keyboard-to-lamp permutation (plugboard included) for every
+        # state, as a (len(states), 26) uint8 array
+        np = load_numpy()
+        offsets = (np.array(states, dtype=np.int64) - np.array(self.rings)) % 26
+        plugboard = np.array(self.plugboard, dtype=np.uint8)
+        forward = [np.array(table, dtype=np.uint8) for table in self.forward_tables]
+        backward = [np.array(table, dtype=np.uint8) for table in self.backward_tables]
+
+        # Static rotors sit at the same positions in every state and are
+        # already in the folded reflector
+        c = np.tile(plugboard, (len(states), 1))
+        for i in range(len(self.positions) - 1, self.static - 1, -1):
+            c = forward[i][offsets[:, i:i + 1], c]
+        c = np.array(self.reflector, dtype=np.uint8)[c]
+        for i in range(self.static, len(self.positions)):
+            c = backward[i][offsets[:, i:i + 1], c]
+        return plugboard[c]
+
+    def encrypt_bytes(self, data):
+        # ASCII letters are encrypted (output upper case), other bytes pass
+        # through unchanged and do not step the rotors.
+        np = load_numpy()
+        if np is None:
+            return self._encrypt_bytes_scalar(data)
+        buffer = np.frombuffer(bytes(data), dtype=np.uint8)
+        output = np.empty_like(buffer)
+        self.encrypt_into(buffer, output)
+        return output.tobytes()
+
+    def encrypt_into(self, buffer, output):
+        # Vectorized engine: every letter's rotor state is known up front, so
+        # the whole buffer becomes one gather from the per-state permutations.
+        # `buffer` and `output` are uint8 arrays of the same length (views
+        # over mapped files work); `output` may be `buffer` itself.
+        np = load_numpy()
+        upper = buffer & 0xDF
+        is_letter = (upper >= ord('A')) & (upper <= ord('Z'))
+        letters = upper[is_letter] - ord('A')
+        del upper
+        count = len(letters)
+        if output is not buffer:
+            output[:] = buffer
+        if count == 0:
+            return
+
+        # Reuse the trajectory from the previous call when the engine is
+        # still where that call left it (streaming chunk by chunk)
+        current = tuple(self.positions)
+        trajectory = self._trajectory
+        if (trajectory is None or trajectory[3] != current
+                or (trajectory[1] is None and trajectory[4] + count >= len(trajectory[0]))):
+            states, cycle_start = self._state_cycle(count)
+            trajectory = (states, cycle_start, self._state_permutations(states).ravel(), current, -1)
+        states, cycle_start, permutations, _, base = trajectory
+        period = len(states) - cycle_start if cycle_start is not None else None
+
+        encrypted = np.empty(count, dtype=np.uint8)
+        for start in range(0, count, self.VECTORIZE_WINDOW):
+            stop = min(start + self.VECTORIZE_WINDOW, count)
+            state_idx = np.arange(base + 1 + start, base + 1 + stop, dtype=np.intp)
+            if period is not None:
+                wrapped = state_idx >= len(states)
+                state_idx[wrapped] = cycle_start + (state_idx[wrapped] - cycle_start) % period
+            encrypted[start:stop] = permutations[state_idx * 26 + letters[start:stop]]
+
+        # Leave the engine where the last key press left it
+        last = base + count
+        if last >= len(states):
+            last = cycle_start + (last - cycle_start) % period
+        self.positions[:] = states[last]
+        self._inner = None
+        self._trajectory = (states, cycle_start, permutations, states[last], last)
+        self.last_key = ALPHABET[letters[-1]]
+        self.last_lamp = ALPHABET[encrypted[-1]]
+
+        encrypted += ord('A')
+        output[is_letter] = encrypted
+
+    def _encrypt_bytes_scalar(self, data):
+        encrypted = bytearray(data)
+        for i, byte in enumerate(encrypted):
+            if ord('A') <= byte & 0xDF <= ord('Z'):
+                encrypted[i] = ord(self.process_letter(chr(byte)))
+        return bytes(encrypted)
+
+    def snapshot(self):
+        return bytes(self.positions)
+
+    def restore(self, positions):
+        self.positions[:] = positions
+        self.reflector = self._fold_reflector()
+        self._inner = None
+
+    def store_positions(self, machine):
+        for rotor, position in zip(machine.rotors, self.positions):
+            rotor.position = position
+
+
+def parse_plugboard(text):
+    # Plugboard settings in the GUI format: "AB CD EF...". Raises ValueError
+    # for anything but pairs of distinct letters, each letter used once.
+    plugboard = EnigmaPlugboard()
+    for pair in text.upper().split():
+        if len(pair) != 2:
+            raise ValueError(f"plugboard pairs are two letters, got {pair!r}")
+        plugboard.add_connection(pair[0], pair[1])
+    return plugboard
+
+def build_machine(rotor_types, ring_settings, positions, reflector_type, plugboard_text=''):
+    # ring_settings and positions are one letter per rotor, left to right
+    if not len(rotor_types) == len(ring_settings) == len(positions):
+        raise ValueError(f"{len(rotor_types)} rotors need as many ring settings and positions, "
+                         f"got {len(ring_settings)} and {len(positions)}")
+    rotors = [EnigmaRotor(rotor_type, ring, position)
+              for rotor_type, ring, position in zip(rotor_types, ring_settings, positions)]
+    return EnigmaMachine(rotors, EnigmaReflector(reflector_type), parse_plugboard(plugboard_text))
+
+def machine_from_config(config_key, positions):
+    # Inverse of EnigmaMachine.config_key(), at the given rotor positions
+    rotor_types, ring_settings, reflector_type, connections = config_key
+    rotors = [EnigmaRotor(rotor_type, ring, position)
+              for rotor_type, ring, position in zip(rotor_types, ring_settings, positions)]
+    plugboard = EnigmaPlugboard.from_pairs(pair for pair in connections if pair[0] < pair[1])
+    return EnigmaMachine(rotors, EnigmaReflector(reflector_type), plugboard)
+
+_ASCII_LETTERS = bytes(range(ord('A'), ord('Z') + 1)) + bytes(range(ord('a'), ord('z') + 1))
+
+def count_letters(text):
+    # Number of characters that step the rotors
+    if text.isascii():
+        data = text.encode('ascii')
+        return len(data) - len(data.translate(None, _ASCII_LETTERS))
+    return sum(1 for char in text if char.isalpha())
+
+def _encrypt_chunk(config_key, positions, chunk):
+    machine = machine_from_config(config_key, positions)
+    encrypted = machine.encrypt_message(chunk)
+    return encrypted, machine.last_key, machine.last_lamp, [rotor.position for rotor in machine.rotors]
+
+def encrypt_parallel(machine, message, workers=None, chunk_size=1 << 20):
+    # Split the message into chunks, start each chunk's machine at the rotor
+    # positions reached after the letters before it, and encrypt the chunks
+    # in a process pool. Same output and final state as
+    # machine.encrypt_message(message).
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(message) <= chunk_size:
+        return machine.encrypt_message(message)
+
+    chunks = [message[i:i + chunk_size] for i in range(0, len(message), chunk_size)]
+    config_key = machine.config_key()
+    start_positions = []
+    offset = 0
+    for chunk in chunks:
+        start_positions.append(machine.positions_after(offset))
+        offset += count_letters(chunk)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_encrypt_chunk, [config_key] * len(chunks), start_positions, chunks))
+
+    # The last chunk's machine stopped where a sequential run would
+    for rotor, position in zip(machine.rotors, results[-1][3]):
+        rotor.position = position
+    for _, last_key, last_lamp, _ in reversed(results):
+        if last_lamp is not None:
+            machine.last_key = last_key
+            machine.last_lamp = last_lamp
+            break
+    return ''.join(encrypted for encrypted, _, _, _ in results)
+
+def encrypt_file(machine, input_path, output_path, window=16 << 20):
+    # Encrypt a file of any size through memory maps: the output file is
+    # sized up front and filled window by window, and pages of both maps
+    # are dropped once a window is done, so memory use stays around one
+    # window. Bytes are treated as in CompiledEnigma.encrypt_bytes.
+    # Returns the number of bytes written.
+    import mmap
+
+    np = load_numpy()
+    engine = machine.compile()
+    size = os.path.getsize(input_path)
+    window = max(window - window % mmap.ALLOCATIONGRANULARITY, mmap.ALLOCATIONGRANULARITY)
+    with open(input_path, 'rb') as src, open(output_path, 'w+b') as dst:
+        dst.truncate(size)
+        if size == 0:
+            return 0
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as source, \
+                mmap.mmap(dst.fileno(), size) as target:
+            for start in range(0, size, window):
+                stop = min(start + window, size)
+                if np is None:
+                    target[start:stop] = engine.encrypt_bytes(source[start:stop])
+                else:
+                    engine.encrypt_into(np.frombuffer(source, dtype=np.uint8, count=stop - start, offset=start),
+                                        np.frombuffer(target, dtype=np.uint8, count=stop - start, offset=start))
+                target.flush(start, stop - start)
+                if hasattr(mmap, 'MADV_DONTNEED'):
+                    source.madvise(mmap.MADV_DONTNEED, start, stop - start)
+                    target.madvise(mmap.MADV_DONTNEED, start, stop - start)
+
+    engine.store_positions(machine)
+    if engine.last_lamp is not None and machine.trace_level != machine.TRACE_OFF:
+        machine.last_key = engine.last_key
+        machine.last_lamp = engine.last_lamp
+    return size
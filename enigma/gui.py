@@ -0,0 +1,1063 @@
+import tkinter as tk
+from tkinter import ttk, font, filedialog, messagebox
+import os
+import queue
+import threading
+from collections import deque
+
+from .core import (EngineMetrics, EnigmaMachine, EnigmaPlugboard, EnigmaReflector, EnigmaRotor,
+                   parse_plugboard)
+
+
+class ScrollableFrame(tk.Frame):
+    def __init__(self, container, bg='#8B7D6B', **kwargs):
+        super().__init__(container, **kwargs)
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+
+
+        self.scrollable_frame = tk.Frame(self.canvas, bg=bg,padx=20, pady=30)
+
+        # Update the scroll region when the size of the scrollable_frame changes.
+        self.scrollable_frame.bind(
+            "<Configure>",
+            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        )
+
+        # Create a window window inside the canvas
+        self.canvas_window = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+
+        # Add mouse wheel support  
+        self.canvas.bind("<Enter>", self._activate_scroll)
+        self.canvas.bind("<Leave>", self._deactivate_scroll)
+
+
+        # Link the scrollbar and the canvas
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Make sure the inner frame's width tracks the canvas's width
+        self.bind("<Configure>", self._on_parent_configure)
+
+    def _activate_scroll(self, event):
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+
+    def _deactivate_scroll(self, event):
+        self.canvas.unbind_all("<MouseWheel>")
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+    # FIXED Complete the frame configuration handler
+    def _on_parent_configure(self, event):
+        """Update the scrollable frame's width to match parent"""
+        if self.scrollable_frame.winfo_reqwidth() != event.width:
+            self.canvas.itemconfig(self.canvas_window, width=event.width)
+
+
+class EnigmaSimulatorApp:
+    def __init__(self, root, metrics=None):
+        self.root = root
+        self.metrics = metrics
+        self.root.title("Enigma Machine Simulator")
+        self.root.configure(bg='#8B7D6B')
+        self.root.geometry("1250x1000")
+        
+        # Set up custom fonts
+        self.enigma_font = font.Font(family='Courier', size=14, weight='bold')
+        self.rotor_font = font.Font(family='Courier', size=12, weight='bold')
+        self.lamp_font = font.Font(family='Courier', size=16, weight='bold')
+        self.title_font = font.Font(family='Times', size=24, weight='bold')
+        
+        # Available rotors and reflectors
+        self.available_rotors = list(EnigmaRotor.HISTORICAL_ROTORS.keys())
+        self.available_reflectors = list(EnigmaReflector.HISTORICAL_REFLECTORS.keys())
+        
+        # Initialize Enigma machine with default configuration
+        rotors = [
+            EnigmaRotor('I', 'A', 'A'),
+            EnigmaRotor('II', 'A', 'A'),
+            EnigmaRotor('III', 'A', 'A')
+        ]
+        reflector = EnigmaReflector('B')
+        plugboard = EnigmaPlugboard()
+        self.enigma = EnigmaMachine(rotors, reflector, plugboard, metrics=self.metrics)
+        
+        # Input and output text, one entry per key press
+        self.input_buffer = []
+        self.output_buffer = []
+        
+        # Animation state
+        self.animation_in_progress = False
+        self.bulk_in_progress = False
+        self.signal_path_idx = 0
+
+        # Key queue and animation scheduler, see _tick
+        self.key_queue = deque()
+        self._tick_id = None
+        self.max_queue_depth = 0
+        self.dropped_frames = 0
+        self.animation_speed = 500  # milliseconds
+
+        # Canvas items by canvas, see _canvas_items
+        self._canvas_cache = {}
+
+        # Opt-in profiling: time redraws, animation frames and scheduler
+        # ticks by wrapping the methods, so nothing changes when it is off
+        if metrics is not None:
+            for name in ('draw_rotors', 'draw_reflector', 'draw_plugboard', 'draw_signal_flow',
+                         'animate_signal_flow', '_tick'):
+                setattr(self, name, metrics.wrap(f'tk.{name.lstrip("_")}', getattr(self, name)))
+
+        # Add scrollbar styling
+        style = ttk.Style()
+        style.theme_use('clam')
+        style.configure("Vertical.TScrollbar",
+            background='#666666',
+            troughcolor='#8B7D6B',
+            bordercolor='#5D5D5D',
+            arrowcolor='#FFFFFF',
+            gripcount=0,
+            width=16
+        )
+
+        self.setup_ui()
+
+
+
+    @property
+    def input_text(self):
+        return ''.join(self.input_buffer)
+
+    @property
+    def output_text(self):
+        return ''.join(self.output_buffer)
+
+    def input_key_handler(self, event):
+        # Only process key events if the input widget has focus.
+        if self.input_display != self.root.focus_get():
+            return "break"
+
+        # Block keys such as BackSpace, Delete, and arrow keys if needed.
+        if event.keysym in ("BackSpace", "Delete", "Left", "Right", "Up", "Down"):
+            return "break"
+
+        # If a printable character is pressed, append it to the input.
+        if event.char and event.char.isprintable():
+            ch = event.char.upper()  # Convert to uppercase
+            self.input_display.config(state='normal')
+            self.input_display.insert("end", ch)
+            self.input_display.config(state='disabled')
+            # After a short delay (200 ms here), process the key
+            self.root.after(200, lambda: self.process_key(ch))
+        return "break"
+    
+    def setup_ui(self):
+        # Replace your existing main_frame initialization with the following:
+        scroll_frame = ScrollableFrame(self.root, bg='#8B7D6B')
+        scroll_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame = scroll_frame.scrollable_frame  # Use this as your new main_frame
+
+
+
+        
+        # Title
+        title_label = tk.Label(main_frame, text="ENIGMA MACHINE", font=self.title_font, 
+                              bg='#8B7D6B', fg='#2F2F2F')
+        credit_label = tk.Label(main_frame, text="By CS-Astronaut", font=self.enigma_font, 
+                              bg='#8B7D6B', fg='#2F2F2F')
+
+        title_label.pack(pady=(0, 20))
+        credit_label.pack(pady=(0, 20))
+        
+        # Settings frame
+        settings_frame = tk.Frame(main_frame, bg='#8B7D6B', relief=tk.RIDGE, bd=5)
+        settings_frame.pack(fill=tk.X, pady=(0, 20))
+
+        
+        # Setup rotor selection
+        rotor_frame = tk.Frame(settings_frame, bg='#8B7D6B')
+        rotor_frame.pack(side=tk.LEFT, padx=10, pady=10)
+        
+        tk.Label(rotor_frame, text="Rotor Selection", font=self.rotor_font, 
+                bg='#8B7D6B', fg='#2F2F2F').pack()
+        
+        # Rotor selection dropdowns
+        self.rotor_vars = []
+        self.rotor_pos_vars = []
+        self.rotor_ring_vars = []
+        
+        for i in range(3):
+            rotor_row = tk.Frame(rotor_frame, bg='#8B7D6B')
+            rotor_row.pack(anchor=tk.W, pady=5)
+            
+            tk.Label(rotor_row, text=f"Rotor {i+1}:", bg='#8B7D6B', fg='#2F2F2F', 
+                    width=8, anchor=tk.W).pack(side=tk.LEFT)
+            
+            rotor_var = tk.StringVar(value=self.enigma.rotors[i].rotor_type)
+            rotor_dropdown = ttk.Combobox(rotor_row, textvariable=rotor_var, values=self.available_rotors, width=5)
+            rotor_dropdown.pack(side=tk.LEFT, padx=5)
+            self.rotor_vars.append(rotor_var)
+            
+            tk.Label(rotor_row, text="Position:", bg='#8B7D6B', fg='#2F2F2F').pack(side=tk.LEFT, padx=(10, 0))
+            pos_var = tk.StringVar(value=self.enigma.rotors[i].get_display_letter())
+            pos_dropdown = ttk.Combobox(rotor_row, textvariable=pos_var, 
+                                       values=[chr(65+j) for j in range(26)], width=2)
+            pos_dropdown.pack(side=tk.LEFT, padx=5)
+            self.rotor_pos_vars.append(pos_var)
+            
+            tk.Label(rotor_row, text="Ring:", bg='#8B7D6B', fg='#2F2F2F').pack(side=tk.LEFT, padx=(10, 0))
+            ring_var = tk.StringVar(value=chr(self.enigma.rotors[i].ring_setting + ord('A')))
+            ring_dropdown = ttk.Combobox(rotor_row, textvariable=ring_var, 
+                                        values=[chr(65+j) for j in range(26)], width=2)
+            ring_dropdown.pack(side=tk.LEFT, padx=5)
+            self.rotor_ring_vars.append(ring_var)
+        
+        # Reflector selection
+        reflector_frame = tk.Frame(settings_frame, bg='#8B7D6B')
+        reflector_frame.pack(side=tk.LEFT, padx=10, pady=10)
+        
+        tk.Label(reflector_frame, text="Reflector", font=self.rotor_font, 
+                bg='#8B7D6B', fg='#2F2F2F').pack()
+        
+        reflector_row = tk.Frame(reflector_frame, bg='#8B7D6B')
+        reflector_row.pack(pady=5)
+        
+        tk.Label(reflector_row, text="Type:", bg='#8B7D6B', fg='#2F2F2F', 
+                width=6, anchor=tk.W).pack(side=tk.LEFT)
+        
+        self.reflector_var = tk.StringVar(value=self.enigma.reflector.reflector_type)
+        reflector_dropdown = ttk.Combobox(reflector_row, textvariable=self.reflector_var, 
+                                        values=self.available_reflectors, width=5)
+        reflector_dropdown.pack(side=tk.LEFT, padx=5)
+        
+        # Plugboard
+        plugboard_frame = tk.Frame(settings_frame, bg='#8B7D6B')
+        plugboard_frame.pack(side=tk.LEFT, padx=10, pady=10)
+        
+        tk.Label(plugboard_frame, text="Plugboard", font=self.rotor_font, 
+                bg='#8B7D6B', fg='#2F2F2F').pack()
+        
+        self.plugboard_var = tk.StringVar(value="")
+        plugboard_entry = tk.Entry(plugboard_frame, textvariable=self.plugboard_var, width=20)
+        plugboard_entry.pack(pady=5)
+        tk.Label(plugboard_frame, text="Format: AB CD EF...", bg='#8B7D6B', fg='#2F2F2F').pack()
+
+
+
+        # Mode Selection: Fast Mode or Learning Mode
+        mode_frame = tk.Frame(settings_frame, bg='#8B7D6B')
+        mode_frame.pack(side=tk.LEFT, padx=10, pady=10)
+
+        tk.Label(mode_frame, text="Mode:", font=self.rotor_font, 
+                 bg='#8B7D6B', fg='#2F2F2F').pack()
+
+        self.mode_var = tk.StringVar(value="fast")  # Default: Learning mode
+
+        learning_mode_rb = tk.Radiobutton(mode_frame, text="Learning", variable=self.mode_var, value="learning",
+                                          bg='#8B7D6B', fg='#2F2F2F', selectcolor='#8B7D6B')
+        learning_mode_rb.pack(anchor="w")  # Stacks vertically, left-aligned
+
+        fast_mode_rb = tk.Radiobutton(mode_frame, text="Fast", variable=self.mode_var, value="fast",
+                                      bg='#8B7D6B', fg='#2F2F2F', selectcolor='#8B7D6B')
+        fast_mode_rb.pack(anchor="w")  # Stacks below the first button, left-aligned
+
+
+
+        
+        # Apply settings button
+        apply_button = tk.Button(settings_frame, text="Apply Settings", command=self.apply_settings, 
+                               bg='#4A4A4A', fg='white', font=self.rotor_font, padx=10)
+        apply_button.pack(side=tk.LEFT, padx=20, pady=10)
+        
+        # Reset button
+        reset_button = tk.Button(settings_frame, text="Reset", command=self.reset_machine, 
+                               bg='#4A4A4A', fg='white', font=self.rotor_font, padx=10)
+        reset_button.pack(side=tk.LEFT, padx=0, pady=10)
+
+        # Load file button (bulk encryption)
+        load_button = tk.Button(settings_frame, text="Load File", command=self.load_file, 
+                               bg='#4A4A4A', fg='white', font=self.rotor_font, padx=10)
+        load_button.pack(side=tk.LEFT, padx=20, pady=10)
+
+
+
+        
+        # Display frame for rotor visualization
+        self.display_frame = tk.Frame(main_frame, bg='#5D5D5D', relief=tk.RIDGE, bd=5)
+        self.display_frame.pack(fill=tk.BOTH, pady=(0, 20), ipady=10)
+        
+        # Rotor display
+        rotor_display = tk.Frame(self.display_frame, bg='#5D5D5D')
+        rotor_display.pack(fill=tk.Y, padx=20, pady=10)
+        
+        # Create canvases for rotors
+        self.rotor_canvases = []
+        
+        # First create reflector display
+        reflector_frame = tk.Frame(rotor_display, bg='#5D5D5D')
+        reflector_frame.pack(side=tk.LEFT, padx=10)
+        
+        tk.Label(reflector_frame, text="Reflector", font=self.rotor_font, 
+                bg='#5D5D5D', fg='white').pack()
+        
+        self.reflector_canvas = tk.Canvas(reflector_frame, width=100, height=300, 
+                                         bg='#3A3A3A', highlightthickness=0)
+        self.reflector_canvas.pack()
+        
+        # Create frames for each rotor
+        for i in range(3):
+            rotor_frame = tk.Frame(rotor_display, bg='#5D5D5D')
+            rotor_frame.pack(side=tk.LEFT, padx=10)
+            
+            tk.Label(rotor_frame, text=f"Rotor {i+1}", font=self.rotor_font, 
+                    bg='#5D5D5D', fg='white').pack()
+            
+            canvas = tk.Canvas(rotor_frame, width=100, height=350, bg='#3A3A3A', highlightthickness=0)
+            canvas.pack()
+            self.rotor_canvases.append(canvas)
+        
+        # Plugboard display
+        plugboard_frame = tk.Frame(rotor_display, bg='#5D5D5D')
+        plugboard_frame.pack(side=tk.LEFT, padx=10)
+        
+        tk.Label(plugboard_frame, text="Plugboard", font=self.rotor_font, 
+                bg='#5D5D5D', fg='white').pack()
+        
+        self.plugboard_canvas = tk.Canvas(plugboard_frame, width=120, height=300, 
+                                         bg='#3A3A3A', highlightthickness=0)
+        self.plugboard_canvas.pack()
+        
+        # Signal flow canvas
+        signal_frame = tk.Frame(self.display_frame, bg='#5D5D5D')
+        signal_frame.pack(fill=tk.X, pady=10)
+        
+        self.signal_canvas = tk.Canvas(signal_frame, height=100, bg='#3A3A3A', highlightthickness=0)
+        self.signal_canvas.pack(fill=tk.X, padx=20)
+        
+        # Text area for input/output display
+        text_frame = tk.Frame(main_frame, bg='#5D5D5D', relief=tk.RIDGE, bd=5)
+        text_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        input_frame = tk.Frame(text_frame, bg='#5D5D5D', pady=10)
+        input_frame.pack(fill=tk.X)
+        tk.Label(input_frame, text="Input Text:", font=self.enigma_font, 
+                bg='#5D5D5D', fg='white').pack(side=tk.LEFT, padx=10)
+
+        # Use a Text widget instead of a Label so the text can be selected and copied.
+        self.input_display = tk.Text(input_frame, font=self.enigma_font, 
+                                    bg='#3A3A3A', fg='white', width=50, height=2, wrap="word",
+                                    padx=10, pady=5, relief=tk.SUNKEN)
+        self.input_display.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+        # Bind focus events
+        self.input_display.bind("<FocusIn>", self.on_focus)
+        self.input_display.bind("<FocusOut>", self.on_unfocus)
+        
+        self.input_display.focus_set()
+        self.input_display.bind("<Key>", self.input_key_handler)
+        self.input_display.bind("<Control-v>", self.paste_input)
+        self.input_display.bind("<Control-V>", self.paste_input)
+        self.input_display.bind("<<Paste>>", self.paste_input)
+        
+        
+        output_frame = tk.Frame(text_frame, bg='#5D5D5D', pady=10)
+        output_frame.pack(fill=tk.X)
+        tk.Label(output_frame, text="Output Text:", font=self.enigma_font, 
+                 bg='#5D5D5D', fg='white').pack(side=tk.LEFT, padx=10)
+
+        # Use a Text widget for the output, set to read-only so users can select/copy but not edit.
+        self.output_display = tk.Text(output_frame, font=self.enigma_font, 
+                                      bg='#3A3A3A', fg='white', width=50, height=2, wrap="word",
+                                      padx=10, pady=5, relief=tk.SUNKEN)
+        self.output_display.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        # Disable editing while allowing selection:
+        self.output_display.config(state='disabled')
+
+        # Progress of bulk (paste / file) encryption
+        progress_frame = tk.Frame(text_frame, bg='#5D5D5D')
+        progress_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.bulk_progress = ttk.Progressbar(progress_frame, maximum=1.0)
+        self.bulk_progress.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.bulk_status = tk.Label(progress_frame, text="", font=self.rotor_font, 
+                                    bg='#5D5D5D', fg='white', width=30, anchor=tk.W)
+        self.bulk_status.pack(side=tk.LEFT, padx=10)
+        self.scheduler_status = tk.Label(progress_frame, text="", font=self.rotor_font, 
+                                         bg='#5D5D5D', fg='white', anchor=tk.E)
+        self.scheduler_status.pack(side=tk.RIGHT, padx=10)
+
+
+        
+        # Lampboard
+        lampboard_frame = tk.Frame(main_frame, bg='#5D5D5D', relief=tk.RIDGE, bd=5)
+        lampboard_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        # Create lampboard display
+        self.create_lampboard(lampboard_frame)
+        
+        # Keyboard
+        keyboard_frame = tk.Frame(main_frame, bg='#5D5D5D', relief=tk.RIDGE, bd=5)
+        keyboard_frame.pack(fill=tk.X)
+        
+        # Create keyboard
+        self.create_keyboard(keyboard_frame)
+        
+        # Bind keys
+        ##self.root.bind("<Key>", self.handle_key_press)
+        
+        # Draw initial rotors
+        self.draw_rotors()
+        self.draw_reflector()
+        self.draw_plugboard()
+
+    def on_focus(self, event):
+        """Change input frame background to orange when focused."""
+        event.widget.master.config(bg="#FFA500")  # Use your original orange color
+    
+    def on_unfocus(self, event):
+        """Reset input frame background when focus is lost."""
+        event.widget.master.config(bg="#5D5D5D")  # Restore the original background
+    
+    
+    def create_lampboard(self, parent):
+        lampboard = tk.Frame(parent, bg='#5D5D5D', padx=20, pady=10)
+        lampboard.pack()
+        
+        tk.Label(lampboard, text="LAMPBOARD", font=self.enigma_font, 
+                bg='#5D5D5D', fg='white').pack(pady=(0, 10))
+        
+        self.lamps = {}
+        
+        # Use the keyboard layout from the Enigma machine
+        keyboard_layout = [
+            "QWERTZUIO",
+            "ASDFGHJK",
+            "PYXCVBNML"
+        ]
+        
+        for row_idx, row in enumerate(keyboard_layout):
+            lamp_row = tk.Frame(lampboard, bg='#5D5D5D')
+            lamp_row.pack(pady=5)
+            
+            for char in row:
+                lamp_frame = tk.Frame(lamp_row, width=50, height=50, relief=tk.RAISED,
+                                     bg='#3A3A3A', bd=3)
+                lamp_frame.pack_propagate(False)  # Prevent widgets inside from changing the frame size
+                lamp_frame.pack(side=tk.LEFT, padx=5)
+                
+                lamp_label = tk.Label(lamp_frame, text=char, font=self.lamp_font, fg='white', bg='#3A3A3A')
+                lamp_label.pack(expand=True)
+                self.lamps[char] = lamp_label
+    
+    def create_keyboard(self, parent):
+        keyboard = tk.Frame(parent, bg='#5D5D5D', padx=20, pady=10)
+        keyboard.pack()
+        
+        tk.Label(keyboard, text="KEYBOARD", font=self.enigma_font, 
+                bg='#5D5D5D', fg='white').pack(pady=(0, 10))
+        
+        self.keys = {}
+        
+        # Use the keyboard layout from the Enigma machine
+        keyboard_layout = [
+            "QWERTZUIO",
+            "ASDFGHJK",
+            "PYXCVBNML"
+        ]
+        
+        for row_idx, row in enumerate(keyboard_layout):
+            key_row = tk.Frame(keyboard, bg='#5D5D5D')
+            key_row.pack(pady=5)
+            
+            for char in row:
+                key_frame = tk.Frame(key_row, width=50, height=50, relief=tk.RAISED,
+                                    bg='#4A4A4A', bd=3)
+                key_frame.pack_propagate(False)  # Prevent widgets inside from changing the frame size
+                key_frame.pack(side=tk.LEFT, padx=5)
+                
+                key_label = tk.Label(key_frame, text=char, font=self.lamp_font, fg='white', bg='#4A4A4A')
+                key_label.pack(expand=True)
+                
+                # Make it clickable
+                key_frame.bind("<Button-1>", lambda e, char=char: self.process_key(char))
+                key_label.bind("<Button-1>", lambda e, char=char: self.process_key(char))
+                
+                self.keys[char] = key_frame
+    
+    def handle_key_press(self, event):
+        key = event.char.upper()
+        if key.isalpha():
+            self.process_key(key)
+    
+    def process_key(self, key):
+        # Press key animation
+        if key in self.keys:
+            self.keys[key].config(relief=tk.SUNKEN)
+            self.root.after(100, lambda: self.keys[key].config(relief=tk.RAISED))
+        
+        # Keys are queued, never dropped, and picked up by a tick right away
+        self.key_queue.append(key)
+        self.max_queue_depth = max(self.max_queue_depth, len(self.key_queue))
+        if self.bulk_in_progress:
+            return
+        if self._tick_id is not None:
+            self.root.after_cancel(self._tick_id)
+        self._tick()
+
+    def _encrypt_key(self, key):
+        # Only learning mode animates the signal path
+        trace_level = EnigmaMachine.TRACE_FULL if self.mode_var.get() == "learning" else EnigmaMachine.TRACE_LAMP
+        switched = self.enigma.trace_level != trace_level
+        self.enigma.trace_level = trace_level
+
+        # Update text
+        self.input_buffer.append(key)
+        output_char = self.enigma.process_letter(key)
+        if switched:
+            # Clear the diagram of the last learning-mode letter
+            self.draw_signal_flow(0)
+        self.output_buffer.append(output_char)
+        
+        # Update displays: append only the new character
+        self.output_display.config(state='normal')
+        self.output_display.insert(tk.END, output_char)
+        self.output_display.config(state='disabled')
+        
+        # Update rotor positions
+        self.draw_rotors()
+        return output_char
+
+    def _tick(self):
+        # Single scheduler tick: encrypt every queued key right away, animate
+        # only the newest one, and skip the frames of any animation that a
+        # newer key overtakes
+        self._tick_id = None
+        if self.bulk_in_progress:
+            return  # _poll_bulk restarts the scheduler when the job is done
+
+        if self.key_queue:
+            if self.animation_in_progress:
+                self.dropped_frames += len(self.enigma.get_signal_path()) - self.signal_path_idx
+                self.signal_path_idx = len(self.enigma.get_signal_path())
+                self.animate_signal_flow()
+
+            while self.key_queue:
+                output_char = self._encrypt_key(self.key_queue.popleft())
+                if output_char not in self.lamps:
+                    continue
+                if self.key_queue:
+                    self.dropped_frames += len(self.enigma.get_signal_path())
+                else:
+                    # Start animation
+                    self.animation_in_progress = True
+                    self.signal_path_idx = 0
+
+        if self.animation_in_progress:
+            self.animate_signal_flow()
+        self._update_scheduler_status()
+
+        if self.animation_in_progress or self.key_queue:
+            self._tick_id = self.root.after(self.animation_speed, self._tick)
+
+    def _update_scheduler_status(self):
+        status = f"Queue: {len(self.key_queue)} (max {self.max_queue_depth})  Dropped frames: {self.dropped_frames}"
+        if status != self.scheduler_status.cget('text'):
+            self.scheduler_status.config(text=status)
+
+    def scheduler_stats(self):
+        return {
+            'queue_depth': len(self.key_queue),
+            'max_queue_depth': self.max_queue_depth,
+            'dropped_frames': self.dropped_frames,
+        }
+    
+    def paste_input(self, event):
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            return "break"
+        self.encrypt_bulk(text)
+        return "break"
+
+    def load_file(self):
+        path = filedialog.askopenfilename(title="Load message")
+        if not path:
+            return
+        with open(path, encoding='utf-8', errors='replace') as f:
+            self.encrypt_bulk(f.read())
+
+    def encrypt_bulk(self, text):
+        # Encrypt a whole paste or file on a background thread with the
+        # compiled engine, then jump the displays to the final state at once
+        # instead of animating every letter
+        if self.bulk_in_progress or self.key_queue or not text:
+            return
+        if self.animation_in_progress:
+            # Jump the running animation to its lamp before the bulk job
+            self.dropped_frames += len(self.enigma.get_signal_path()) - self.signal_path_idx
+            self.signal_path_idx = len(self.enigma.get_signal_path())
+            self.animate_signal_flow()
+        text = text.upper()
+        machine = self.enigma
+        engine = machine.compile()
+        progress = queue.Queue()
+        chunk_size = 1 << 16
+
+        def worker():
+            encrypted = []
+            for start in range(0, len(text), chunk_size):
+                encrypted.append(engine.encrypt_message(text[start:start + chunk_size]))
+                progress.put(min(start + chunk_size, len(text)) / len(text))
+            progress.put(''.join(encrypted))
+
+        self.bulk_in_progress = True
+        self.bulk_status.config(text=f"Encrypting {len(text)} characters...")
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(50, self._poll_bulk, machine, engine, text, progress)
+
+    def _poll_bulk(self, machine, engine, text, progress):
+        # Tk is not thread safe: the worker only reports through the queue
+        encrypted = None
+        while not progress.empty():
+            item = progress.get()
+            if isinstance(item, str):
+                encrypted = item
+            else:
+                self.bulk_progress['value'] = item
+        if encrypted is None:
+            self.root.after(50, self._poll_bulk, machine, engine, text, progress)
+            return
+        self.bulk_in_progress = False
+
+        # Settings were applied or reset meanwhile: the result is stale
+        if machine is not self.enigma:
+            self.bulk_status.config(text="")
+            self.bulk_progress['value'] = 0
+            self._resume_scheduler()
+            return
+
+        engine.store_positions(machine)
+        machine.signal_path = machine.NO_SIGNAL_PATH
+        if engine.last_lamp is not None:
+            machine.last_key = engine.last_key
+            machine.last_lamp = engine.last_lamp
+
+        self.input_buffer.extend(text)
+        self.output_buffer.extend(encrypted)
+        for display, content in ((self.input_display, text), (self.output_display, encrypted)):
+            display.config(state='normal')
+            display.insert(tk.END, content)
+            display.config(state='disabled')
+
+        self.draw_rotors()
+        self.draw_signal_flow(0)
+        final_char = machine.last_lamp
+        if final_char in self.lamps:
+            self.lamps[final_char].config(bg='#FFA500', fg='black')
+            self.root.after(200, lambda: self.lamps[final_char].config(bg='#3A3A3A', fg='white'))
+        self.bulk_status.config(text=f"Encrypted {len(text)} characters")
+        self._resume_scheduler()
+
+    def _resume_scheduler(self):
+        # Keys typed during a bulk job were queued behind it
+        if self.key_queue and self._tick_id is None:
+            self._tick()
+
+    def animate_signal_flow(self):
+        if self.signal_path_idx >= len(self.enigma.get_signal_path()):
+            # Animation complete - light final lamp
+            final_char = self.enigma.last_lamp
+            if final_char in self.lamps:
+                self.lamps[final_char].config(bg='#FFA500', fg='black')  # Light up in orange
+
+                if self.mode_var.get() == "fast":  # Fast mode: Show all fast
+                    self.root.after(200, lambda: self.lamps[final_char].config(bg='#3A3A3A', fg='white'))  # Turn off
+                else:
+                    self.root.after(self.animation_speed, lambda: self.lamps[final_char].config(bg='#3A3A3A', fg='white'))  # Turn off                    
+            
+            self.animation_in_progress = False
+            return
+        
+        # Draw current state of signal flow
+        self.draw_signal_flow(self.signal_path_idx)
+        
+        # Increment; the scheduler tick draws the next frame
+        self.signal_path_idx += 1
+        
+        if self.mode_var.get() == "fast":  # Fast mode: Show all fast
+            self.animation_speed = 20
+        else: self.animation_speed = 400
+    
+
+
+
+    # Stages shown on the signal flow canvas, left to right
+    SIGNAL_STAGES = ["input", "plugboard", "rotor_3 forward", "rotor_2 forward", 
+                     "rotor_1 forward", "reflector", "rotor_1 backward", 
+                     "rotor_2 backward", "rotor_3 backward", "plugboard out"]
+
+    def _canvas_items(self, canvas, build):
+        # Canvas items are created once by build(canvas, width, height) and
+        # then updated in place; they are only rebuilt when the canvas size
+        # changes (the first draws happen before the window is laid out)
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        items = self._canvas_cache.get(str(canvas))
+        if items is None or items['size'] != (width, height):
+            canvas.delete("all")
+            items = build(canvas, width, height)
+            items['size'] = (width, height)
+            items['options'] = {}
+            self._canvas_cache[str(canvas)] = items
+        return items
+
+    def _set_item(self, canvas, items, item, **options):
+        # itemconfig only when the options differ from what the item has
+        if items['options'].get(item) != options:
+            canvas.itemconfig(item, **options)
+            items['options'][item] = options
+
+    def _build_signal_items(self, canvas, width, height):
+        items = {'positions': [], 'arrows': []}
+        stages = self.SIGNAL_STAGES
+        for i, s in enumerate(stages):
+            items['positions'].append((width * (i + 1) / (len(stages) + 1), height / 2))
+        
+        # Draw all stages
+        for i, s in enumerate(stages):
+            x, y = items['positions'][i]
+            canvas.create_oval(x-15, y-15, x+15, y+15, fill="#2F2F2F", tags="flow")
+            canvas.create_text(x, y+25, text=s.split(" ")[0], fill="white", tags="flow")
+        
+        # Current stage highlight and character, moved from stage to stage
+        items['highlight'] = canvas.create_oval(0, 0, 0, 0, outline="#FFA500", width=3, tags="flow")
+        items['char'] = canvas.create_text(0, 0, text="", fill="white", font=self.enigma_font, tags="flow")
+        
+        # Arrows between stages
+        for i in range(len(stages) - 1):
+            x1, y1 = items['positions'][i]
+            x2, y2 = items['positions'][i+1]
+            items['arrows'].append(canvas.create_line(x1+15, y1, x2-15, y2, fill="#555555", arrow=tk.LAST, tags="flow"))
+        
+        canvas.itemconfig("flow", state='hidden')
+        items['visible'] = False
+        return items
+
+    def _show_signal_flow(self, canvas, items, visible):
+        if items['visible'] != visible:
+            canvas.itemconfig("flow", state='normal' if visible else 'hidden')
+            items['visible'] = visible
+            items['options'].clear()
+
+    def draw_signal_flow(self, idx):
+        canvas = self.signal_canvas
+        items = self._canvas_items(canvas, self._build_signal_items)
+        
+        signal_path = self.enigma.get_signal_path()
+        if idx >= len(signal_path):
+            self._show_signal_flow(canvas, items, False)
+            return
+        self._show_signal_flow(canvas, items, True)
+        stage, char = signal_path[idx]
+        stages = self.SIGNAL_STAGES
+        
+        # Find position of current stage
+        current_stage = stage
+        if "rotor" in current_stage:
+            parts = current_stage.split(" ")
+            if len(parts) > 1:
+                # Normalize the stage name to match our stages list
+                current_stage = parts[0] + " " + parts[1]
+        
+        # Find the closest stage in our pre-defined list
+        closest_stage = None
+        for s in stages:
+            if current_stage in s:
+                closest_stage = s
+                break
+        
+        if closest_stage is None:
+            for item in [items['highlight'], items['char']] + items['arrows']:
+                self._set_item(canvas, items, item, state='hidden')
+            return
+        
+        stage_idx = stages.index(closest_stage)
+        x, y = items['positions'][stage_idx]
+        # Highlight current stage and display current character
+        canvas.coords(items['highlight'], x-20, y-20, x+20, y+20)
+        canvas.coords(items['char'], x, y)
+        self._set_item(canvas, items, items['highlight'], state='normal')
+        self._set_item(canvas, items, items['char'], text=char, state='normal')
+        
+        # Arrows up to the current stage are drawn as passed
+        for i, arrow in enumerate(items['arrows']):
+            arrow_color = "#AAAAAA" if i < stage_idx else "#555555"
+            self._set_item(canvas, items, arrow, fill=arrow_color, state='normal')
+
+
+    def _build_rotor_items(self, canvas, width, height):
+        items = {'outputs': []}
+        
+        # Draw rotor body
+        canvas.create_rectangle(10, 50, width-10, height-50, fill='#6B5B45', outline='#2F2F2F', width=2)
+        
+        # Rotor type display
+        items['type'] = canvas.create_text(width/2, 20, text="", font=self.rotor_font, fill='white')
+        
+        # Display current position
+        canvas.create_rectangle(width/2-15, 75, width/2+15, 105, fill='white', outline='black')
+        items['position'] = canvas.create_text(width/2, 90, text="", font=self.rotor_font, fill='black')
+        
+        # Indicate notch positions
+        items['notch'] = canvas.create_text(width/2, height-30, text="", font=self.rotor_font, fill='white')
+        
+        # Show wiring visualization (simplified): a few letters and their mappings
+        start_y = 120
+        spacing = 15
+        for j in range(10):
+            canvas.create_text(width/2-20, start_y + j*spacing, text=chr(j + ord('A')), font=self.rotor_font, fill='white')
+            items['outputs'].append(canvas.create_text(width/2+20, start_y + j*spacing, text="", font=self.rotor_font, fill='white'))
+            canvas.create_line(width/2-15, start_y + j*spacing, width/2+15, start_y + j*spacing, fill='white')
+        return items
+
+    def draw_rotors(self):
+        # For each rotor, update its visual representation
+        for i, rotor in enumerate(self.enigma.rotors):
+            canvas = self.rotor_canvases[i]
+            items = self._canvas_items(canvas, self._build_rotor_items)
+            
+            # Get current rotor wiring
+            rotor_type = rotor.rotor_type
+            wiring = EnigmaRotor.HISTORICAL_ROTORS[rotor_type]
+            
+            self._set_item(canvas, items, items['type'], text=f"Type {rotor_type}")
+            self._set_item(canvas, items, items['position'], text=rotor.get_display_letter())
+            self._set_item(canvas, items, items['notch'], text=f"Notch: {EnigmaRotor.NOTCH_POSITIONS[rotor_type]}")
+            
+            for j, item in enumerate(items['outputs']):
+                # Apply the rotor's forward mapping to this letter
+                input_letter = chr(j + ord('A'))
+                output_idx = (wiring.find(input_letter) - rotor.position + rotor.ring_setting) % 26
+                self._set_item(canvas, items, item, text=chr(output_idx + ord('A')))
+    
+    def _build_reflector_items(self, canvas, width, height):
+        items = {'outputs': []}
+        
+        # Draw reflector body
+        canvas.create_rectangle(10, 50, width-10, height-50, fill='#696969', outline='#2F2F2F', width=2)
+        items['type'] = canvas.create_text(width/2, 20, text="", font=self.rotor_font, fill='white')
+        
+        # Show a few mappings
+        start_y = 80
+        spacing = 15
+        for j in range(10):
+            canvas.create_text(width/2-20, start_y + j*spacing, text=chr(j + ord('A')), font=self.rotor_font, fill='white')
+            items['outputs'].append(canvas.create_text(width/2+20, start_y + j*spacing, text="", font=self.rotor_font, fill='white'))
+            
+            # Draw connecting line
+            canvas.create_line(width/2-15, start_y + j*spacing, width/2+15, start_y + j*spacing, 
+                             fill='white', arrow=tk.BOTH)
+        return items
+
+    def draw_reflector(self):
+        # Update reflector visualization
+        canvas = self.reflector_canvas
+        items = self._canvas_items(canvas, self._build_reflector_items)
+        
+        # Get reflector type
+        reflector_type = self.enigma.reflector.reflector_type
+        self._set_item(canvas, items, items['type'], text=f"Type {reflector_type}")
+        
+        # Get output letters from reflector
+        wiring = EnigmaReflector.HISTORICAL_REFLECTORS[reflector_type]
+        for j, item in enumerate(items['outputs']):
+            self._set_item(canvas, items, item, text=wiring[j])
+    
+    def _build_plugboard_items(self, canvas, width, height):
+        items = {'rows': []}
+        
+        # Draw plugboard body
+        canvas.create_rectangle(10, 50, width-10, height-50, fill='#4A4A4A', outline='#2F2F2F', width=2)
+        
+        # Draw title
+        canvas.create_text(width/2, 20, text="Connections", font=self.rotor_font, fill='white')
+        
+        # Up to 10 connection rows, hidden until used
+        start_y = 80
+        spacing = 20
+        for row in range(10):
+            y = start_y + row*spacing
+            items['rows'].append((
+                canvas.create_text(width/2-15, y, text="", font=self.rotor_font, fill='white', state='hidden'),
+                canvas.create_text(width/2+15, y, text="", font=self.rotor_font, fill='white', state='hidden'),
+                canvas.create_line(width/2-10, y, width/2+10, y, fill='white', width=2, state='hidden'),
+            ))
+        return items
+
+    def draw_plugboard(self):
+        # Visualize the plugboard connections
+        canvas = self.plugboard_canvas
+        items = self._canvas_items(canvas, self._build_plugboard_items)
+        
+        # Each connection pair (but only once)
+        pairs = []
+        drawn_pairs = set()
+        for char1, char2 in self.enigma.plugboard.connections.items():
+            if (char1, char2) not in drawn_pairs and (char2, char1) not in drawn_pairs:
+                drawn_pairs.add((char1, char2))
+                pairs.append((char1, char2))
+                if len(pairs) >= 10:  # Maximum display
+                    break
+        
+        for row, (text1, text2, line) in enumerate(items['rows']):
+            if row < len(pairs):
+                char1, char2 = pairs[row]
+                self._set_item(canvas, items, text1, text=char1, state='normal')
+                self._set_item(canvas, items, text2, text=char2, state='normal')
+                self._set_item(canvas, items, line, state='normal')
+            else:
+                for item in (text1, text2, line):
+                    self._set_item(canvas, items, item, state='hidden')
+    
+    def apply_settings(self):
+        # Create new rotors based on settings
+        new_rotors = []
+        for i in range(3):
+            rotor_type = self.rotor_vars[i].get()
+            position = self.rotor_pos_vars[i].get()
+            ring_setting = self.rotor_ring_vars[i].get()
+            
+            new_rotors.append(EnigmaRotor(rotor_type, ring_setting, position))
+        
+        # Create new reflector
+        reflector_type = self.reflector_var.get()
+        new_reflector = EnigmaReflector(reflector_type)
+        
+        # Create new plugboard; a letter on two cables keeps the old settings
+        try:
+            new_plugboard = parse_plugboard(self.plugboard_var.get())
+        except ValueError as error:
+            messagebox.showerror("Plugboard", str(error))
+            return
+        
+        # Create new Enigma machine
+        self.enigma = EnigmaMachine(new_rotors, new_reflector, new_plugboard, metrics=self.metrics)
+        
+        # Reset text
+        self.input_buffer.clear()
+        self.output_buffer.clear()
+
+        self.input_display.config(state='normal')  # Enable editing temporarily
+        self.input_display.delete("1.0", tk.END)     # Clear all text
+        self.input_display.config(state='disabled')  # Disable editing if needed
+        
+        self.output_display.config(state='normal')  # Enable editing temporarily
+        self.output_display.delete("1.0", tk.END)     # Clear all text from the widget
+        self.output_display.config(state='disabled')  # Re-disable editing if needed
+        
+        # Update displays
+        self.draw_rotors()
+        self.draw_reflector()
+        self.draw_plugboard()
+
+        # Set focus for entry on input frame
+        self.input_display.focus_set()
+
+    
+    def reset_machine(self):
+        # Reset the initial rotors
+        rotors = [
+            EnigmaRotor('I', 'A', 'A'),
+            EnigmaRotor('II', 'A', 'A'),
+            EnigmaRotor('III', 'A', 'A')
+        ]
+        reflector = EnigmaReflector('B')
+        plugboard = EnigmaPlugboard()
+        
+        # Reset the Enigma machine
+        self.enigma = EnigmaMachine(rotors, reflector, plugboard, metrics=self.metrics)
+        
+        # Reset variables
+        for i in range(3):
+            self.rotor_vars[i].set(rotors[i].rotor_type)
+            self.rotor_pos_vars[i].set(rotors[i].get_display_letter())
+            self.rotor_ring_vars[i].set('A')
+        
+        self.reflector_var.set('B')
+        self.plugboard_var.set('')
+        
+        # Reset text
+        self.input_buffer.clear()
+        self.output_buffer.clear()
+
+        self.input_display.config(state='normal')  # Enable editing temporarily
+        self.input_display.delete("1.0", tk.END)     # Clear all text
+        self.input_display.config(state='disabled')  # Disable editing if needed
+        
+        self.output_display.config(state='normal')  # Enable editing temporarily
+        self.output_display.delete("1.0", tk.END)     # Clear all text from the widget
+        self.output_display.config(state='disabled')  # Re-disable editing if needed
+
+        # Update displays
+        self.draw_rotors()
+        self.draw_reflector()
+        self.draw_plugboard()
+
+class EnigmaApp:
+    def __init__(self):
+        # Create the main window
+        root = tk.Tk()
+        root.title("Enigma Machine Simulator")
+        
+        # Set window icon if available
+
+        icon_path = os.path.join("icons","Enigma-logo.png")
+        try:
+            img = tk.PhotoImage(file=icon_path)
+            root.iconphoto(True, img)
+        except:
+            pass
+
+        # Set initial size
+        root.geometry("1200x800")
+        
+        # Apply vintage aesthetics
+        self.apply_vintage_style()
+
+        # ENIGMA_METRICS=path turns on profiling and dumps it there on exit
+        # (Prometheus text for *.prom, JSON otherwise)
+        metrics = None
+        metrics_path = os.environ.get('ENIGMA_METRICS')
+        if metrics_path:
+            metrics = EngineMetrics()
+            metrics.dump_on_exit(metrics_path)
+
+        # Create simulator instance
+        self.simulator = EnigmaSimulatorApp(root, metrics)
+        root.update_idletasks()
+
+        self.simulator.reset_machine()
+
+        # Start main loop
+        root.mainloop()
+   
+    def apply_vintage_style(self):
+        # Apply a vintage, military-era look to the application
+        style = ttk.Style()
+        
+        # Configure vintage colors and fonts for widgets
+        style.configure("TButton", 
+                     font=('Courier', 10, 'bold'),
+                     background='#4A4A4A', 
+                     foreground='white')
+        
+        style.configure("TCombobox",
+                      font=('Courier', 10),
+                      background='#4A4A4A')
+        
+        style.map("TButton",
+               background=[('active', '#5D5D5D')],
+               foreground=[('active', 'white')])
@@ -0,0 +1,353 @@
+"""Precomputed keystream tables, stored on disk and memory-mapped.
+
+For one configuration (rotor types, rings, reflector, plugboard) every
+rotor state has a fixed keyboard-to-lamp permutation, and stepping is a
+fixed map from state to state that ends in cycles. A table file holds both
+for every state, so encrypting from any start position is two gathers, and
+worker processes mapping the same file share one copy through the page
+cache.
+
+File layout (little-endian), each array aligned to 64 bytes:
+
+    header      magic b'ENKS', version u16, rotor count u16,
+                cycle states u32, config length u32
+    config      JSON of EnigmaMachine.config_key()
+    successor   u32[26**n]   state after one key press
+    where       u32[26**n]   index into `order`, NONE off the cycles
+    begin       u32[26**n]   start of the state's cycle in `order`
+    length      u32[26**n]   length of the state's cycle
+    order       u32[cycle states]   cycles, one after the other
+    permutations u8[26**n, 26]      plugboard included on both sides
+
+States are packed like rotor positions read as base-26 numbers, leftmost
+rotor most significant.
+
+KeystreamTable.in_memory builds the same arrays without a file, for the
+three stepping rotors only at fixed positions of any static ones (the
+M4's greek rotor), which keeps it at 26**3 states.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+MAGIC = b'ENKS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+ALIGN = 64
+NONE = 0xFFFFFFFF
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def config_json(config_key):
+    rotor_types, rings, reflector_type, connections = config_key
+    return json.dumps({'rotors': list(rotor_types), 'rings': list(rings), 'reflector': reflector_type,
+                       'plugboard': [list(pair) for pair in connections]}, sort_keys=True)
+
+
+def all_states(n):
+    # Every rotor state as an (26**n, n) array, in packed order
+    return np.indices((26,) * n).reshape(n, -1).T
+
+
+def pack(positions):
+    state = 0
+    for position in positions:
+        state = state * 26 + position % 26
+    return state
+
+
+def unpack(state, n):
+    positions = []
+    for _ in range(n):
+        state, position = divmod(state, 26)
+        positions.append(position)
+    return positions[::-1]
+
+
+def notch_successors(notch_flags):
+    # Packed state after one key press for every packed state of rotors
+    # with these notch flags (left to right): EnigmaMachine._step_positions
+    # over all states at once
+    n = len(notch_flags)
+    states = all_states(n)
+    notch = [np.array(flags, dtype=bool) for flags in notch_flags]
+    first = max(0, n - 3)
+    stepping = n - first
+
+    after = states.copy()
+    rightmost_at_notch = notch[-1][states[:, -1]]
+    middle_at_notch = np.zeros(len(states), dtype=bool)
+    if stepping > 1:
+        middle_at_notch = notch[first + 1][states[:, first + 1]]
+    if stepping > 2:
+        after[middle_at_notch, first] += 1
+    if stepping > 1:
+        after[rightmost_at_notch | middle_at_notch, first + 1] += 1
+    after[:, -1] += 1
+    after %= 26
+    return (after @ (26 ** np.arange(n - 1, -1, -1))).astype(np.uint32)
+
+
+def state_successors(machine, static=0):
+    # notch_successors for the machine, leaving out the first `static`
+    # rotors (which never step)
+    return notch_successors([rotor.notch_flags for rotor in machine.rotors[static:]])
+
+
+def cycle_tables(successor):
+    # where, begin, length and order for a successor map. States still
+    # reachable after enough presses are the ones on cycles; f^k(all
+    # states) shrinks until the transients have run out
+    size = len(successor)
+    image = np.arange(size, dtype=np.uint32)
+    reachable = size + 1
+    while True:
+        image = np.unique(successor[image])
+        if len(image) == reachable:
+            break
+        reachable = len(image)
+
+    where = np.full(size, NONE, dtype=np.uint32)
+    begin = np.full(size, NONE, dtype=np.uint32)
+    length = np.full(size, NONE, dtype=np.uint32)
+    order = []
+    step = successor.tolist()
+    for start in image.tolist():
+        if where[start] != NONE:
+            continue
+        cycle_begin = len(order)
+        state = start
+        while True:
+            where[state] = len(order)
+            order.append(state)
+            state = step[state]
+            if state == start:
+                break
+        begin[order[cycle_begin:]] = cycle_begin
+        length[order[cycle_begin:]] = len(order) - cycle_begin
+    return {'where': where, 'begin': begin, 'length': length, 'order': np.array(order, dtype=np.uint32)}
+
+
+def build_tables(machine):
+    # The arrays of a table file for the machine's configuration
+    n = len(machine.rotors)
+    size = 26 ** n
+    successor = state_successors(machine)
+    tables = cycle_tables(successor)
+
+    # Static rotors (the M4's greek rotor) are folded into the engine's
+    # reflector at fixed positions, so each of their settings is one block
+    engine = machine.compile()
+    states = all_states(n)
+    static = engine.static
+    block = 26 ** (n - static)
+    permutations = np.empty((size, 26), dtype=np.uint8)
+    for start in range(0, size, block):
+        engine.restore(states[start].tolist())
+        permutations[start:start + block] = engine._state_permutations(states[start:start + block])
+
+    tables.update(successor=successor, permutations=permutations)
+    return tables
+
+
+def stepping_tables(machine):
+    # The arrays of KeystreamTable.in_memory: the three stepping rotors
+    # only, with any static rotors at their current positions
+    engine = machine.compile()
+    static = engine.static
+    n = len(machine.rotors) - static
+    successor = state_successors(machine, static)
+    tables = cycle_tables(successor)
+    states = np.hstack([np.tile(engine.positions[:static], (26 ** n, 1)).astype(np.intp), all_states(n)])
+    engine.restore(states[0].tolist())
+    tables.update(successor=successor, permutations=engine._state_permutations(states))
+    return tables
+
+
+def write_table(path, config_key, tables):
+    # Written to a temporary file and renamed into place, so concurrent
+    # workers never map a half-written table
+    config = config_json(config_key).encode('utf-8')
+    n = len(config_key[0])
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, n, len(tables['order']), len(config)))
+            f.write(config)
+            for name in KeystreamTable.SECTIONS:
+                f.write(b'\0' * (_aligned(f.tell()) - f.tell()))
+                f.write(tables[name].tobytes())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class KeystreamTable:
+    """Read-only view of one table file through a memory map."""
+
+    SECTIONS = ('successor', 'where', 'begin', 'length', 'order', 'permutations')
+    # Leading rotors left out of the states (in_memory tables only)
+    static = 0
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, cycle_states, config_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a keystream table")
+        if version != VERSION:
+            raise ValueError(f"{path}: table version {version}, expected {VERSION}")
+        self.path = path
+        self.rotor_count = n
+        self.config = self._map[HEADER.size:HEADER.size + config_length].decode('utf-8')
+
+        size = 26 ** n
+        shapes = {'successor': (size,), 'where': (size,), 'begin': (size,), 'length': (size,),
+                  'order': (cycle_states,), 'permutations': (size, 26)}
+        offset = HEADER.size + config_length
+        for name in self.SECTIONS:
+            dtype = np.uint8 if name == 'permutations' else np.uint32
+            offset = _aligned(offset)
+            count = int(np.prod(shapes[name]))
+            array = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset).reshape(shapes[name])
+            setattr(self, name, array)
+            offset += array.nbytes
+
+    @classmethod
+    def in_memory(cls, machine, tables=None):
+        # Table for the machine's configuration at its current positions of
+        # the static rotors, held in memory; good for those positions only.
+        # `tables` are stepping_tables(machine) if already built elsewhere
+        # (in a worker process, say).
+        static = max(0, len(machine.rotors) - 3)
+        table = cls.__new__(cls)
+        table._map = None
+        table.path = None
+        table.rotor_count = len(machine.rotors) - static
+        table.static = static
+        table.config = config_json(machine.config_key())
+        for name, array in (tables or stepping_tables(machine)).items():
+            setattr(table, name, array)
+        return table
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.SECTIONS)
+
+    def key_press_states(self, positions, count):
+        # Rotor state at each of the next `count` key presses
+        state = pack(positions)
+        head = []
+        while len(head) < count:
+            state = int(self.successor[state])
+            if self.where[state] != NONE:
+                break
+            head.append(state)
+        else:
+            return np.array(head, dtype=np.intp)
+
+        begin = int(self.begin[state])
+        start = int(self.where[state]) - begin
+        cycle = np.arange(start, start + count - len(head), dtype=np.intp) % int(self.length[state])
+        return np.concatenate([np.array(head, dtype=np.intp), self.order[begin + cycle]])
+
+    def encrypt_bytes(self, data, positions):
+        # Same bytes as CompiledEnigma.encrypt_bytes from `positions` (all
+        # rotors, static ones included). Returns (output, rotor positions
+        # after the last letter).
+        buffer = np.frombuffer(bytes(data), dtype=np.uint8)
+        upper = buffer & 0xDF
+        is_letter = (upper >= ord('A')) & (upper <= ord('Z'))
+        letters = upper[is_letter] - ord('A')
+        if not len(letters):
+            return bytes(buffer), list(positions)
+
+        static = list(positions[:self.static])
+        states = self.key_press_states(positions[self.static:], len(letters))
+        output = buffer.copy()
+        output[is_letter] = self.permutations[states, letters] + ord('A')
+        return output.tobytes(), static + unpack(int(states[-1]), self.rotor_count)
+
+    def close(self):
+        for name in self.SECTIONS:
+            setattr(self, name, None)
+        if self._map is not None:
+            self._map.close()
+
+
+class KeystreamStore:
+    """Directory of table files, one per configuration, built on first use.
+    Tables are checked against the configuration and rebuilt if the file
+    is from another format version. At most `max_open` tables stay mapped;
+    the least recently used one is closed first."""
+
+    def __init__(self, directory, max_open=16):
+        self.directory = directory
+        self.max_open = max_open
+        self._tables = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, config_key):
+        digest = hashlib.sha1(config_json(config_key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest[:20]}.eks')
+
+    def open_table(self, machine):
+        # The configuration's table if it is open or already on disk, else
+        # None; never builds, so it is cheap enough for an event loop
+        config_key = machine.config_key()
+        table = self._tables.get(config_key)
+        if table is not None:
+            self._tables.move_to_end(config_key)
+            return table
+        try:
+            table = KeystreamTable(self.path(config_key))
+        except (OSError, ValueError):
+            return None
+        if table.config != config_json(config_key):
+            table.close()
+            return None
+        return self._add(config_key, table)
+
+    def build(self, machine):
+        # Build and write the configuration's table file (seconds and about
+        # 21 MB for an M4), without opening it here
+        config_key = machine.config_key()
+        write_table(self.path(config_key), config_key, build_tables(machine))
+
+    def table(self, machine):
+        table = self.open_table(machine)
+        if table is None:
+            self.build(machine)
+            table = self.open_table(machine)
+        return table
+
+    def _add(self, config_key, table):
+        self._tables[config_key] = table
+        if len(self._tables) > self.max_open:
+            self._tables.popitem(last=False)[1].close()
+        return table
+
+    def encrypt_bytes(self, machine, data):
+        # Encrypt from the machine's rotor positions and leave the rotors
+        # where the last letter left them, like EnigmaMachine.encrypt_message
+        encrypted, positions = self.table(machine).encrypt_bytes(
+            data, [rotor.position for rotor in machine.rotors])
+        for rotor, position in zip(machine.rotors, positions):
+            rotor.position = position
+        return encrypted
+
+    def close(self):
+        for table in self._tables.values():
+            table.close()
+        self._tables.clear()
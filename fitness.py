@@ -0,0 +1,181 @@
+import math
+
+import numpy as np
+
+from enigma import ALPHABET
+
+# Rows scored per block; bounds the (rows x n-grams) code arrays
+BLOCK_ROWS = 1 << 14
+
+# Approximate German letter frequencies in percent, enough to rank
+# decryptions when no n-gram counts are at hand
+GERMAN_UNIGRAMS = {
+    'A': 6.51, 'B': 1.89, 'C': 3.06, 'D': 5.08, 'E': 17.40, 'F': 1.66, 'G': 3.01, 'H': 4.76,
+    'I': 7.55, 'J': 0.27, 'K': 1.21, 'L': 3.44, 'M': 2.53, 'N': 9.78, 'O': 2.51, 'P': 0.79,
+    'Q': 0.02, 'R': 7.00, 'S': 7.27, 'T': 6.15, 'U': 4.35, 'V': 0.67, 'W': 1.89, 'X': 0.03,
+    'Y': 0.04, 'Z': 1.13,
+}
+
+
+def letter_codes(texts):
+    # Letters of equally long texts (machine output, say) as a 2-D uint8
+    # array of 0-25; anything that is not A-Z is dropped first
+    rows = []
+    for text in texts:
+        data = text.upper().encode('ascii', 'ignore') if isinstance(text, str) else bytes(text).upper()
+        row = np.frombuffer(data, dtype=np.uint8)
+        rows.append(row[(row >= ord('A')) & (row <= ord('Z'))] - ord('A'))
+    if len({len(row) for row in rows}) > 1:
+        raise ValueError("texts must have the same number of letters")
+    if not rows:
+        return np.empty((0, 0), dtype=np.uint8)
+    return np.stack(rows)
+
+
+class NgramScorer:
+    """Log10 probabilities of 1- to 4-grams as dense float32 tables, indexed
+    by the n-gram packed as a base-26 number (first letter most
+    significant). N-grams never seen get a floor of log10(0.01 / total)."""
+
+    def __init__(self, tables):
+        # tables: {n: float32 array of 26**n log probabilities}
+        for n, table in tables.items():
+            if table.shape != (26 ** n,):
+                raise ValueError(f"{n}-gram table must have {26 ** n} entries, got {table.shape}")
+        self.tables = {n: np.ascontiguousarray(table, dtype=np.float32) for n, table in tables.items()}
+
+    @classmethod
+    def from_counts(cls, counts):
+        # counts: {n: {ngram: count}}
+        if not counts:
+            raise ValueError("no n-gram counts given")
+        tables = {}
+        for n, ngram_counts in counts.items():
+            total = sum(ngram_counts.values())
+            if total <= 0:
+                raise ValueError(f"no {n}-grams counted")
+            table = np.full(26 ** n, math.log10(0.01 / total), dtype=np.float32)
+            for ngram, count in ngram_counts.items():
+                code = 0
+                for letter in ngram:
+                    code = code * 26 + ALPHABET.index(letter)
+                table[code] = math.log10(count / total)
+            tables[n] = table
+        return cls(tables)
+
+    @classmethod
+    def from_text(cls, text, orders=(1, 2, 3, 4)):
+        # Train on a corpus; only its letters count, case ignored. Orders
+        # longer than the corpus are left out.
+        letters = letter_codes([text])[0].astype(np.int64)
+        counts = {}
+        for n in orders:
+            if n > len(letters):
+                continue
+            codes = _pack(letters[None, :], n)[0]
+            ngram_counts = np.bincount(codes, minlength=26 ** n)
+            counts[n] = {_unpack(code, n): int(count) for code, count in enumerate(ngram_counts) if count}
+        if not counts:
+            raise ValueError(f"corpus has {len(letters)} letters, too few for any of the orders {tuple(orders)}")
+        return cls.from_counts(counts)
+
+    @classmethod
+    def from_files(cls, paths):
+        # Count files with one "NGRAM COUNT" per line, as commonly
+        # published; the order comes from the n-gram length
+        counts = {}
+        for path in paths:
+            with open(path) as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) == 2:
+                        ngram = fields[0].upper()
+                        counts.setdefault(len(ngram), {})[ngram] = int(fields[1])
+        return cls.from_counts(counts)
+
+    @classmethod
+    def german_unigrams(cls):
+        return cls.from_counts({1: GERMAN_UNIGRAMS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({int(name[1:]): data[name] for name in data.files})
+
+    def save(self, path):
+        np.savez(path, **{f'n{n}': table for n, table in self.tables.items()})
+
+    def score(self, letters, n=None):
+        # Sum of n-gram log probabilities per row of a 2-D array of letter
+        # codes (one candidate decryption per row); a 1-D array is one text.
+        # n defaults to the highest order loaded.
+        n = n or max(self.tables)
+        table = self.tables[n]
+        letters = np.asarray(letters)
+        single = letters.ndim == 1
+        if single:
+            letters = letters[None, :]
+        scores = np.zeros(len(letters), dtype=np.float64)
+        if letters.shape[1] >= n:
+            for start in range(0, len(letters), BLOCK_ROWS):
+                block = letters[start:start + BLOCK_ROWS]
+                scores[start:start + len(block)] = table[_pack(block, n)].sum(axis=1, dtype=np.float64)
+        return scores[0] if single else scores
+
+    def score_texts(self, texts, n=None):
+        return self.score(letter_codes(texts), n)
+
+
+def _pack(letters, n):
+    # Codes of every n-gram of every row: (rows, length - n + 1) int32
+    count = letters.shape[1] - n + 1
+    codes = letters[:, :count].astype(np.int32)
+    for i in range(1, n):
+        codes *= 26
+        codes += letters[:, i:i + count]
+    return codes
+
+
+def _unpack(code, n):
+    letters = []
+    for _ in range(n):
+        code, letter = divmod(code, 26)
+        letters.append(ALPHABET[letter])
+    return ''.join(reversed(letters))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build n-gram tables and score texts")
+    parser.add_argument('--train', metavar='CORPUS', help="text file to count n-grams from")
+    parser.add_argument('--counts', nargs='+', metavar='FILE', help='"NGRAM COUNT" files')
+    parser.add_argument('--save', metavar='PATH', help="write the tables as .npz")
+    parser.add_argument('--tables', metavar='PATH', help="load tables saved with --save")
+    parser.add_argument('--benchmark', type=int, metavar='ROWS', help="time scoring random texts")
+    parser.add_argument('texts', nargs='*', help="texts to score")
+    args = parser.parse_args()
+
+    if args.tables:
+        scorer = NgramScorer.load(args.tables)
+    elif args.counts:
+        scorer = NgramScorer.from_files(args.counts)
+    elif args.train:
+        with open(args.train, encoding='utf-8', errors='ignore') as f:
+            scorer = NgramScorer.from_text(f.read())
+    else:
+        scorer = NgramScorer.german_unigrams()
+    if args.save:
+        scorer.save(args.save)
+
+    for text in args.texts:
+        print(f"{scorer.score_texts([text])[0]:12.2f}  {text}")
+
+    if args.benchmark:
+        texts = np.random.default_rng(0).integers(0, 26, size=(args.benchmark, 100), dtype=np.uint8)
+        start = time.perf_counter()
+        scorer.score(texts)
+        elapsed = time.perf_counter() - start
+        print(f"{args.benchmark} texts of 100 letters in {elapsed:.3f} s "
+              f"({args.benchmark / elapsed * 60:,.0f} texts/min)")
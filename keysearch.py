@@ -0,0 +1,137 @@
+import heapq
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from bombe import ALL_STATES, letters_only, scrambler_tables, state_successors
+from enigma import ALPHABET, EnigmaReflector
+
+# Start states decrypted together; bounds the (states x letters) work arrays
+BLOCK_STATES = 2048
+
+
+def index_of_coincidence(counts, length):
+    # counts: (..., 26) letter counts of texts `length` letters long
+    counts = counts.astype(np.float64)
+    return (counts * (counts - 1)).sum(axis=-1) / (length * (length - 1))
+
+
+def score_order(ciphertext, rotor_types, reflector_type, top_k, scorer=None):
+    # Decrypt the ciphertext from every start position of one rotor order
+    # with an empty plugboard and keep the top_k by Index of Coincidence,
+    # or by n-gram log probability if a fitness.NgramScorer is given.
+    # Returns [(score, rotor_types, reflector_type, positions)].
+    cipher = np.array([ord(c) - ord('A') for c in ciphertext], dtype=np.intp)
+    length = len(cipher)
+    scrambler = scrambler_tables(rotor_types, reflector_type)
+    successor = state_successors(rotor_types)
+
+    best = []
+    for block_start in range(0, len(ALL_STATES), BLOCK_STATES):
+        starts = np.arange(block_start, min(block_start + BLOCK_STATES, len(ALL_STATES)))
+        plain = np.empty((len(starts), length), dtype=np.intp)
+        states = starts
+        for i, c in enumerate(cipher):
+            states = successor[states]
+            plain[:, i] = scrambler[states * 26 + c]
+
+        if scorer is not None:
+            scores = scorer.score(plain)
+        else:
+            # Letter counts of every decryption in one bincount
+            plain += np.arange(len(starts))[:, None] * 26
+            counts = np.bincount(plain.ravel(), minlength=len(starts) * 26).reshape(len(starts), 26)
+            scores = index_of_coincidence(counts, length)
+        keep = min(top_k, len(scores))
+        for i in np.argpartition(scores, -keep)[-keep:]:
+            positions = ''.join(ALPHABET[p] for p in ALL_STATES[starts[i]])
+            candidate = (float(scores[i]), tuple(rotor_types), reflector_type, positions)
+            if len(best) < top_k:
+                heapq.heappush(best, candidate)
+            else:
+                heapq.heappushpop(best, candidate)
+    return best
+
+
+class KeySearch:
+    """Ciphertext-only search over rotor orders, reflectors and start
+    positions (ring settings A, empty plugboard), ranked by Index of
+    Coincidence or, given a scorer, by n-gram fitness. Each rotor order +
+    reflector is one shard of 17576 keys."""
+
+    def __init__(self, ciphertext, rotors=('I', 'II', 'III', 'IV', 'V'), reflectors=('B',), top_k=10,
+                 scorer=None):
+        self.ciphertext = letters_only(ciphertext)
+        if len(self.ciphertext) < 2:
+            raise ValueError("ciphertext needs at least two letters")
+        self.rotors = rotors
+        self.reflectors = reflectors
+        self.top_k = top_k
+        self.scorer = scorer
+
+    def shards(self):
+        return [(order, reflector)
+                for order in itertools.permutations(self.rotors, 3)
+                for reflector in self.reflectors]
+
+    def run(self, workers=None, progress=None):
+        # `progress`, if given, is called after each shard with
+        # (keys done, total keys, keys per second, ETA in seconds).
+        # Returns the best candidates, highest score first.
+        shards = self.shards()
+        total_keys = len(shards) * len(ALL_STATES)
+        best = []
+        keys_done = 0
+        start = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = [executor.submit(score_order, self.ciphertext, order, reflector, self.top_k, self.scorer)
+                       for order, reflector in shards]
+            for future in as_completed(futures):
+                for candidate in future.result():
+                    if len(best) < self.top_k:
+                        heapq.heappush(best, candidate)
+                    else:
+                        heapq.heappushpop(best, candidate)
+
+                keys_done += len(ALL_STATES)
+                if progress:
+                    elapsed = time.perf_counter() - start
+                    rate = keys_done / elapsed if elapsed > 0 else 0.0
+                    eta = (total_keys - keys_done) / rate if rate else float('inf')
+                    progress(keys_done, total_keys, rate, eta)
+
+        return sorted(best, reverse=True)
+
+
+def print_progress(keys_done, total_keys, rate, eta):
+    print(f"\r{keys_done}/{total_keys} keys, {rate:,.0f} keys/s, ETA {eta:.0f} s",
+          end='', file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ciphertext-only key search by Index of Coincidence")
+    parser.add_argument('ciphertext')
+    parser.add_argument('--rotors', nargs='+', default=['I', 'II', 'III', 'IV', 'V'])
+    parser.add_argument('--reflectors', nargs='+', default=['B'],
+                        choices=list(EnigmaReflector.HISTORICAL_REFLECTORS))
+    parser.add_argument('--top', type=int, default=10, help="number of candidates to keep")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--ngrams', metavar='PATH', help="rank by n-gram tables saved with fitness.py --save")
+    args = parser.parse_args()
+
+    scorer = None
+    if args.ngrams:
+        from fitness import NgramScorer
+        scorer = NgramScorer.load(args.ngrams)
+    search = KeySearch(args.ciphertext, args.rotors, args.reflectors, args.top, scorer)
+    candidates = search.run(args.workers, print_progress)
+    print(file=sys.stderr)
+    for score, rotor_types, reflector_type, positions in candidates:
+        print(f"{score:.5f}  {'-'.join(rotor_types)}  {reflector_type}  {positions}")
@@ -0,0 +1,322 @@
+"""Local encryption service.
+
+Protocol: each request is one JSON header line followed by `length` raw
+payload bytes; each response is the same. Request headers carry the
+machine settings in the GUI formats:
+
+    {"rotors": ["I", "II", "III"], "rings": "AAA", "positions": "AAA",
+     "reflector": "B", "plugboard": "AB CD", "length": 11}
+
+ASCII letters in the payload are encrypted (upper case), other bytes pass
+through. {"command": "stats"} returns request latency percentiles.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from enigma import ALPHABET, build_machine, load_numpy, machine_from_config
+
+# Payloads at least this large are encrypted in the worker pool
+OFFLOAD_THRESHOLD = 64 << 10
+# Idle machines kept per configuration
+POOL_SIZE = 8
+# Memory for in-memory keystream tables (about 0.8 MB each), per process
+TABLE_CACHE_BYTES = 256 << 20
+# Requests under one configuration before it gets a table; until then the
+# compiled engine serves it, so one-off keys never pay for a table
+TABLE_AFTER_REQUESTS = 3
+# Configurations whose request counts are remembered
+SEEN_SIZE = 4096
+# Latency samples kept for the percentiles
+LATENCY_WINDOW = 10000
+
+# In-memory keystream tables inside each worker process (set up by
+# _init_worker, since they are per process)
+_worker_tables = None
+# Keystream tables shared by the workers through the page cache, if enabled
+_worker_store = None
+
+
+def _init_worker(tables):
+    global _worker_store, _worker_tables
+    _worker_tables = TableCache()
+    if tables:
+        from enigma.keystream import KeystreamStore
+        _worker_store = KeystreamStore(tables)
+
+
+def _encrypt_in_worker(config_key, positions, payload):
+    machine = machine_from_config(config_key, positions)
+    if _worker_store is not None:
+        return _worker_store.encrypt_bytes(machine, payload)
+    # Already off the event loop here, so a wanted table is built in place
+    key = (config_key, tuple(positions[:-3]))
+    table = _worker_tables.get(key)
+    if table is None and _worker_tables.wanted(key):
+        from enigma.keystream import KeystreamTable
+        table = _worker_tables.add(key, KeystreamTable.in_memory(machine))
+    if table is None:
+        return machine.compile().encrypt_bytes(payload)
+    return table.encrypt_bytes(payload, positions)[0]
+
+
+def _build_stored_table(config_key, positions):
+    # Worker side of building a table file for the server's store
+    machine = machine_from_config(config_key, positions)
+    if _worker_store.open_table(machine) is None:
+        _worker_store.build(machine)
+
+
+def _build_table(config_key, positions):
+    # Worker side of TableCache building: the arrays, pickled back
+    from enigma.keystream import stepping_tables
+    return stepping_tables(machine_from_config(config_key, positions))
+
+
+class TableCache:
+    """In-memory keystream tables (KeystreamTable.in_memory) by
+    configuration plus static rotor positions, bounded by their total size
+    with the least recently used dropped first. A configuration is only
+    worth a table once it has been asked for `build_after` times; wanted()
+    counts the requests and says when to build."""
+
+    def __init__(self, max_bytes=TABLE_CACHE_BYTES, build_after=TABLE_AFTER_REQUESTS):
+        self.max_bytes = max_bytes
+        self.build_after = build_after
+        self.nbytes = 0
+        self._tables = OrderedDict()
+        self._seen = OrderedDict()
+        # Keys with a build under way, so it is only started once
+        self.building = set()
+
+    def get(self, key):
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+        return table
+
+    def wanted(self, key):
+        # Count one request for a configuration without a table
+        if load_numpy() is None or key in self.building:
+            return False
+        count = self._seen.pop(key, 0) + 1
+        if count < self.build_after:
+            self._seen[key] = count
+            if len(self._seen) > SEEN_SIZE:
+                self._seen.popitem(last=False)
+            return False
+        return True
+
+    def add(self, key, table):
+        self.building.discard(key)
+        if table.nbytes > self.max_bytes:
+            return table
+        self._tables[key] = table
+        self.nbytes += table.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._tables.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+        return table
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class MachinePool:
+    """Idle machines per configuration. A machine is handed out at the
+    requested rotor positions and returned after use."""
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = {}
+
+    def acquire(self, settings):
+        rotor_types, rings, positions, reflector_type, plugboard_text = settings
+        idle = self._idle.get((tuple(rotor_types), rings, reflector_type, plugboard_text))
+        if idle:
+            machine = idle.pop()
+            for rotor, position in zip(machine.rotors, positions):
+                rotor.position = ord(position) - ord('A')
+            return machine
+        return build_machine(rotor_types, rings, positions, reflector_type, plugboard_text)
+
+    def release(self, settings, machine):
+        rotor_types, rings, _, reflector_type, plugboard_text = settings
+        idle = self._idle.setdefault((tuple(rotor_types), rings, reflector_type, plugboard_text), [])
+        if len(idle) < self.size:
+            idle.append(machine)
+
+
+class EnigmaServer:
+    def __init__(self, workers=None, offload_threshold=OFFLOAD_THRESHOLD, tables=None):
+        # `tables`: directory of precomputed keystream tables (enigma.keystream)
+        self.pool = MachinePool()
+        self.tables = TableCache()
+        # Table builds under way, referenced until they finish
+        self._builds = set()
+        # Configurations whose store table file a worker is writing
+        self._store_builds = set()
+        self.store = None
+        if tables:
+            from enigma.keystream import KeystreamStore
+            self.store = KeystreamStore(tables)
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                            initializer=_init_worker, initargs=(tables,))
+        self.offload_threshold = offload_threshold
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+
+    def parse_settings(self, header):
+        rotor_types = header.get('rotors', ['I', 'II', 'III'])
+        rings = header.get('rings', 'A' * len(rotor_types)).upper()
+        positions = header.get('positions', 'A' * len(rotor_types)).upper()
+        for value in (rings, positions):
+            if len(value) != len(rotor_types) or not all(c in ALPHABET for c in value):
+                raise ValueError(f"expected {len(rotor_types)} letters A-Z, got {value!r}")
+        return rotor_types, rings, positions, header.get('reflector', 'B'), header.get('plugboard', '')
+
+    async def encrypt(self, settings, payload):
+        machine = self.pool.acquire(settings)
+        try:
+            if len(payload) < self.offload_threshold:
+                if self.store is not None:
+                    return self.encrypt_stored(machine, payload)
+                return self.encrypt_small(settings, machine, payload)
+            # Large payloads go to the worker pool so the event loop stays responsive
+            positions = [rotor.position for rotor in machine.rotors]
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, _encrypt_in_worker, machine.config_key(), positions, payload)
+        finally:
+            self.pool.release(settings, machine)
+
+    def encrypt_small(self, settings, machine, payload):
+        # Through the configuration's table if it has one, else through the
+        # compiled engine; tables are built in the worker pool, never here
+        rotor_types, rings, positions, reflector_type, plugboard_text = settings
+        key = (tuple(rotor_types), rings, reflector_type, plugboard_text, positions[:-3])
+        table = self.tables.get(key)
+        if table is not None:
+            return table.encrypt_bytes(payload, [rotor.position for rotor in machine.rotors])[0]
+        if self.tables.wanted(key):
+            self.tables.building.add(key)
+            task = asyncio.get_running_loop().create_task(
+                self._add_table(key, machine.config_key(), [rotor.position for rotor in machine.rotors]))
+            self._builds.add(task)
+            task.add_done_callback(self._builds.discard)
+        return machine.compile().encrypt_bytes(payload)
+
+    def encrypt_stored(self, machine, payload):
+        # Through the store's table file if it exists; otherwise the worker
+        # pool writes it while the compiled engine serves the request
+        if self.store.open_table(machine) is not None:
+            return self.store.encrypt_bytes(machine, payload)
+        config_key = machine.config_key()
+        if config_key not in self._store_builds:
+            self._store_builds.add(config_key)
+            future = self.executor.submit(_build_stored_table, config_key,
+                                          [rotor.position for rotor in machine.rotors])
+            future.add_done_callback(lambda _: self._store_builds.discard(config_key))
+        return machine.compile().encrypt_bytes(payload)
+
+    async def _add_table(self, key, config_key, positions):
+        from enigma.keystream import KeystreamTable
+        loop = asyncio.get_running_loop()
+        try:
+            arrays = await loop.run_in_executor(self.executor, _build_table, config_key, positions)
+        except Exception:
+            # Keep serving through the compiled engine; the next requests
+            # will ask for the table again
+            self.tables.building.discard(key)
+            raise
+        self.tables.add(key, KeystreamTable.in_memory(machine_from_config(config_key, positions), arrays))
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'latency_ms': {
+                'p50': percentile(latencies, 0.50),
+                'p90': percentile(latencies, 0.90),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1] if latencies else None,
+            },
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                payload = b''
+                try:
+                    header = json.loads(line)
+                    if header.get('command') == 'stats':
+                        response = self.stats()
+                    else:
+                        data = await reader.readexactly(int(header.get('length', 0)))
+                        payload = await self.encrypt(self.parse_settings(header), data)
+                        response = {'status': 'ok'}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {'status': 'error', 'error': str(error)}
+
+                response['length'] = len(payload)
+                writer.write(json.dumps(response).encode() + b'\n' + payload)
+                await writer.drain()
+                if response.get('status') == 'ok':
+                    self.requests += 1
+                    self.latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+        if self.store is not None:
+            self.store.close()
+
+
+async def request(reader, writer, payload=b'', **header):
+    # Client side of the protocol: send one request, return (header, payload)
+    header['length'] = len(payload)
+    writer.write(json.dumps(header).encode() + b'\n' + payload)
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    return response, await reader.readexactly(response['length'])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local Enigma encryption service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for large payloads")
+    parser.add_argument('--tables', metavar='DIR', help="keep precomputed keystream tables here and share them")
+    args = parser.parse_args()
+
+    enigma_server = EnigmaServer(args.workers, tables=args.tables)
+    try:
+        asyncio.run(enigma_server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        enigma_server.close()
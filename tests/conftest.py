@@ -0,0 +1,25 @@
+import os
+import sys
+
+# The tests import the top-level modules (enigma, batch, ...) from the
+# repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import enigma  # noqa: E402
+
+ROTORS = ['I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII']
+
+
+def random_settings(rng):
+    # build_machine arguments for a random three-rotor machine or, half the
+    # time, an M4 with a greek rotor and thin reflector
+    rotors = rng.sample(ROTORS, 3)
+    reflector = rng.choice(['B', 'C'])
+    if rng.random() < 0.5:
+        rotors.insert(0, rng.choice(['Beta', 'Gamma']))
+        reflector = rng.choice(['BThin', 'CThin'])
+    rings = ''.join(rng.choices(enigma.ALPHABET, k=len(rotors)))
+    positions = ''.join(rng.choices(enigma.ALPHABET, k=len(rotors)))
+    letters = rng.sample(enigma.ALPHABET, 2 * rng.randint(0, 10))
+    plugboard = ' '.join(letters[i] + letters[i + 1] for i in range(0, len(letters), 2))
+    return rotors, rings, positions, reflector, plugboard
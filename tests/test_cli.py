@@ -0,0 +1,39 @@
+import pytest
+
+import enigma
+
+M4 = ['--rings', 'AAAV', '--positions', 'VJNA', '--reflector', 'BThin',
+      '--plugboard', 'AT BL DF GJ HM NW OP QY RZ VX']
+
+
+@pytest.fixture
+def files(tmp_path):
+    first = tmp_path / 'first.txt'
+    second = tmp_path / 'second.txt'
+    first.write_bytes(b'NCZWV USXPN\n')
+    second.write_bytes(b'YMINH ZXMQX\n')
+    return str(first), str(second)
+
+
+@pytest.mark.parametrize('order', [
+    lambda rotors, files: [*rotors, *M4, *files],
+    lambda rotors, files: [*files, *rotors, *M4],
+    lambda rotors, files: [files[0], *rotors, files[1], *M4],
+])
+@pytest.mark.parametrize('rotors', ['Beta II IV I', 'Beta,II,IV,I'])
+def test_settings_and_files_in_any_order(order, rotors, files, tmp_path):
+    output = tmp_path / 'out.txt'
+    argv = order(['--rotors', rotors], files) + ['--output', str(output), '--quiet']
+    assert enigma.run_cli(argv) == 0
+    assert output.read_bytes() == b'VONVO NJLOO\nKSJHF FTTTE\n'
+
+
+@pytest.mark.parametrize('argv', [
+    ['--rotors', 'I IX III'],
+    ['--rotors', ''],
+    ['--rotors', 'I', 'II', 'III'],
+])
+def test_bad_rotors(argv, files, capsys):
+    with pytest.raises(SystemExit):
+        enigma.run_cli(argv + [files[0]])
+    assert 'error' in capsys.readouterr().err
@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+import enigma
+from conftest import random_settings
+
+M4_SETTINGS = (['Beta', 'II', 'IV', 'I'], 'AAAV', 'VJNA', 'BThin', 'AT BL DF GJ HM NW OP QY RZ VX')
+M4_CIPHERTEXT = (
+    'NCZWVUSXPNYMINHZXMQXSFWXWLKJAHSHNMCOCCAKUQPMKCSMHKSEINJUSBLKIOSXCKUBHMLLXCSJUSRRDVKOHULXWCCBG'
+    'VLIYXEOAHXRHKKFVDREWEZLXOBAFGYUJQUKGRTVUKAMEURBVEKSUHHVOYHABCJWMAKLFKLMYFVNRIZRVVRTKOFDANJMOL'
+    'BGFFLEOPRGTFLVRHOWOPBEKVWMUQFMPWPARMFHAGKXIIBG')
+M4_PLAINTEXT = (
+    'VONVONJLOOKSJHFFTTTEINSEINSDREIZWOYYQNNSNEUNINHALTXXBEIANGRIFFUNTERWASSERGEDRUECKTYWABOSXLETZ'
+    'TERGEGNERSTANDNULACHTDREINULUHRMARQUANTONJOTANEUNACHTSEYHSDREIYZWOZWONULGRADYACHTSMYSTOSSENACH'
+    'XEKNSVIERMBFAELLTYNNNNNNOOOVIERYSICHTEINSNULL')
+
+
+def reference(settings, message):
+    # Letter by letter through EnigmaMachine.process_letter; returns the
+    # output and the rotor positions afterwards
+    machine = enigma.build_machine(*settings)
+    encrypted = ''.join(machine.process_letter(char) for char in message)
+    return encrypted, [rotor.position for rotor in machine.rotors]
+
+
+def positions(machine):
+    return [rotor.position for rotor in machine.rotors]
+
+
+def random_text(rng, length):
+    return ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz  .,\n')
+                   for _ in range(length))
+
+
+def test_three_rotor_vector():
+    machine = enigma.build_machine(['I', 'II', 'III'], 'AAA', 'AAA', 'B')
+    assert machine.encrypt_message('AAAAA') == 'BDZGO'
+
+
+@pytest.mark.parametrize('text, expected', [(M4_CIPHERTEXT, M4_PLAINTEXT), (M4_PLAINTEXT, M4_CIPHERTEXT)])
+def test_m4_vector(text, expected):
+    assert reference(M4_SETTINGS, text)[0] == expected
+    assert enigma.build_machine(*M4_SETTINGS).encrypt_message(text) == expected
+
+
+@pytest.mark.parametrize('seed', range(16))
+def test_compiled_matches_process_letter(seed):
+    rng = random.Random(seed)
+    settings = random_settings(rng)
+    message = random_text(rng, 700) + 'Äö'
+    machine = enigma.build_machine(*settings)
+    expected, expected_positions = reference(settings, message)
+    assert machine.encrypt_message(message) == expected
+    assert positions(machine) == expected_positions
+    assert machine.last_lamp == expected[-1]
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_vectorized_matches_process_letter(seed):
+    pytest.importorskip('numpy')
+    rng = random.Random(seed)
+    settings = random_settings(rng)
+    message = random_text(rng, 3 * enigma.CompiledEnigma.VECTORIZE_THRESHOLD)
+    machine = enigma.build_machine(*settings)
+    expected, expected_positions = reference(settings, message)
+    assert machine.encrypt_message(message) == expected
+    assert positions(machine) == expected_positions
+
+    engine = enigma.build_machine(*settings).compile()
+    assert engine.encrypt_bytes(message.encode('ascii')) == expected.encode('ascii')
+    assert list(engine.positions) == expected_positions
+
+
+@pytest.mark.parametrize('maxsize', [4 * 26 ** 3, 50])
+def test_cached_matches_process_letter(maxsize):
+    # A small cache keeps evicting; one cache is shared by all the machines
+    cache = enigma.PermutationCache(maxsize)
+    rng = random.Random(maxsize)
+    for _ in range(10):
+        settings = random_settings(rng)
+        message = random_text(rng, 400) + 'é'
+        expected, expected_positions = reference(settings, message)
+        for _ in range(2):
+            machine = enigma.build_machine(*settings)
+            machine.permutation_cache = cache
+            assert machine.encrypt_message(message) == expected
+            assert positions(machine) == expected_positions
+    assert cache.stats()['size'] <= maxsize
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_stream_matches_process_letter(seed):
+    rng = random.Random(seed)
+    settings = random_settings(rng)
+    message = random_text(rng, 3000)
+    expected, expected_positions = reference(settings, message)
+
+    machine = enigma.build_machine(*settings)
+    stream = enigma.StreamEncryptor(machine)
+    cuts = sorted(rng.sample(range(1, len(message)), 12))
+    chunks = [message[a:b] for a, b in zip([0] + cuts, cuts + [len(message)])]
+    # Alternate str and bytes chunks
+    chunks = [chunk.encode('ascii') if i % 2 else chunk for i, chunk in enumerate(chunks)]
+    output = ''.join(chunk.decode('ascii') if isinstance(chunk, bytes) else chunk
+                     for chunk in stream.feed(chunks))
+
+    # bytes chunks come out upper case
+    assert output.upper() == expected.upper()
+    assert positions(machine) == expected_positions
+    assert stream.letters == enigma.count_letters(message)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_keystream_matches_process_letter(seed, tmp_path):
+    pytest.importorskip('numpy')
+    from enigma.keystream import KeystreamStore, KeystreamTable
+
+    rng = random.Random(seed)
+    settings = random_settings(rng)
+    message = random_text(rng, 2000)
+    expected, expected_positions = reference(settings, message)
+
+    store = KeystreamStore(str(tmp_path))
+    try:
+        machine = enigma.build_machine(*settings)
+        assert store.encrypt_bytes(machine, message.encode('ascii')) == expected.upper().encode('ascii')
+        assert positions(machine) == expected_positions
+    finally:
+        store.close()
+
+    machine = enigma.build_machine(*settings)
+    table = KeystreamTable.in_memory(machine)
+    encrypted, after = table.encrypt_bytes(message.encode('ascii'), positions(machine))
+    assert encrypted == expected.upper().encode('ascii')
+    assert after == expected_positions
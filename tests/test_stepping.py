@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+import enigma
+from conftest import random_settings
+
+
+def walk(machine, presses):
+    # Rotor positions after each of `presses` key presses, stepped one at a time
+    positions = [rotor.position for rotor in machine.rotors]
+    states = []
+    for _ in range(presses):
+        machine._step_positions(positions)
+        states.append(list(positions))
+    return states
+
+
+def test_seek_past_a_pending_double_step():
+    machine = enigma.build_machine(['VII', 'VI', 'V'], 'AAA', 'YLZ', 'B')
+    machine.seek(625)
+    assert machine.get_rotor_positions() == ['A', 'M', 'A']
+
+
+@pytest.mark.parametrize('seed', range(24))
+def test_positions_after_matches_stepping(seed):
+    machine = enigma.build_machine(*random_settings(random.Random(seed)))
+    for steps, expected in enumerate(walk(machine, 3000), 1):
+        assert machine.positions_after(steps) == expected, steps
+
+
+@pytest.mark.parametrize('rotors', [['I'], ['VI', 'VII']])
+def test_positions_after_with_fewer_rotors(rotors):
+    machine = enigma.build_machine(rotors, 'A' * len(rotors), 'C' * len(rotors), 'B')
+    for steps, expected in enumerate(walk(machine, 800), 1):
+        assert machine.positions_after(steps) == expected, steps
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_cycle_length_matches_stepping(seed):
+    # Past any start-up transient the walk repeats after exactly
+    # cycle_length presses
+    machine = enigma.build_machine(*random_settings(random.Random(seed)))
+    length = machine.cycle_length()
+    states = walk(machine, 100 + length + 1)
+    start = states[100]
+    assert [i for i in range(101, 101 + length) if states[i] == start] == [100 + length]
+
+
+def test_seek_moves_the_rotors():
+    machine = enigma.build_machine(['I', 'II', 'III'], 'AAA', 'ADU', 'B')
+    expected = machine.positions_after(1000)
+    machine.seek(1000)
+    assert [rotor.position for rotor in machine.rotors] == expected
+    with pytest.raises(ValueError):
+        machine.seek(-1)
+
+
+@pytest.mark.parametrize('settings, message', [
+    ((['VII', 'VI', 'V'], 'AAA', 'YLZ', 'B', ''), 'A' * 625),
+    ((['Beta', 'II', 'IV', 'I'], 'AAAV', 'VJNA', 'BThin', 'AT BL DF'), 'HELLO world, ' * 150),
+])
+def test_encrypt_parallel_matches_sequential(settings, message):
+    machine = enigma.build_machine(*settings)
+    reference = enigma.build_machine(*settings)
+    expected = reference.encrypt_message(message)
+    assert enigma.encrypt_parallel(machine, message, workers=2, chunk_size=400) == expected
+    assert machine.snapshot() == reference.snapshot()
+    assert (machine.last_key, machine.last_lamp) == (reference.last_key, reference.last_lamp)